@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""End-to-end pipeline benchmark on recorded input - no webcam needed.
+
+    python benchmark.py recording.mp4 --sessions 2 --viewers 1
+    python benchmark.py recording.mp4 --max-speed --json results.json
+    python benchmark.py landmarks.npz --max-speed
+    python benchmark.py recording.mp4 --max-speed --record datasets/
+
+Video files run through the real GameSession camera path (grabber, pipeline,
+gesture loop, broadcaster); landmark dumps (.npz or landmark recorder
+directories, see src/replay_source.py) run through the client landmark path.
+Reports FPS, per-stage latency percentiles and CPU per session. With --record,
+the landmarks every session observes are also saved as a tuning dataset.
+
+In real-time mode the 'grab' stage includes waiting for the recording's frame
+rate, like waiting for a camera; use --max-speed to see decode cost.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+from game_server import GameServer
+from src.game_logging import setup_logging, shutdown_logging
+from src.landmark_packet import encode_packet
+from src.replay_source import replay_landmarks
+from src.stage_timer import StageStats
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def cpu_seconds(stat_path):
+    """utime + stime from a /proc stat file, or None where it can't be read"""
+    try:
+        with open(stat_path) as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class SessionRun:
+    """One benchmarked session: its stage stats, progress and CPU samples"""
+
+    def __init__(self, session, path, realtime, loop, viewers):
+        self.session = session
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.viewers = viewers
+        self.landmarks = path.endswith('.npz') or os.path.isdir(path)
+
+        self.stats = StageStats()
+        self.session.stage_hooks.append(self.stats.record)
+
+        self.thread = None
+        self.done = threading.Event()
+        self.stop_requested = threading.Event()
+        self.dropped_frames = 0
+        self.roi_placements = 0
+        self.cpu = {}  # /proc stat path -> latest cpu seconds seen
+
+    def start(self):
+        if self.landmarks:
+            self.session.start_client_input()
+            self.thread = threading.Thread(target=self._feed_landmarks)
+            self.thread.daemon = True
+            self.thread.start()
+            return True
+
+        if not self.session.start_replay(self.path, realtime=self.realtime, loop=self.loop):
+            return False
+        for _ in range(self.viewers):
+            viewer = threading.Thread(target=self._watch)
+            viewer.daemon = True
+            viewer.start()
+        return True
+
+    def _feed_landmarks(self):
+        for frame in replay_landmarks(self.path, realtime=self.realtime):
+            if self.stop_requested.is_set():
+                break
+            self.session.process_landmark_packet(encode_packet(frame.points, frame.handedness, frame.aspect))
+        self.done.set()
+
+    def _watch(self):
+        broadcaster = self.session.broadcaster
+        if broadcaster is not None:
+            for _ in broadcaster.stream():
+                pass
+
+    def _cpu_sources(self):
+        session = self.session
+        threads = [self.thread, session.camera_thread,
+                   session.grabber.thread if session.grabber else None,
+                   session.pipeline.thread if session.pipeline else None,
+                   session.broadcaster.thread if session.broadcaster else None]
+        paths = [f"/proc/self/task/{thread.native_id}/stat" for thread in threads if thread is not None]
+
+        for hands in (session.hands, session.reacquire_hands):
+            worker = getattr(hands, 'process_handle', None)
+            if worker is not None:
+                paths.append(f"/proc/{worker.pid}/stat")
+        return paths
+
+    def sample(self):
+        """Record CPU and progress counters while the session's threads still exist"""
+        for path in self._cpu_sources():
+            seconds = cpu_seconds(path)
+            if seconds is not None:
+                self.cpu[path] = max(seconds, self.cpu.get(path, 0.0))
+
+        if self.session.grabber is not None:
+            self.dropped_frames = self.session.grabber.dropped_frames
+        if self.session.pipeline is not None and self.session.pipeline.roi_tracker is not None:
+            self.roi_placements = self.session.pipeline.roi_tracker.placements
+        if not self.landmarks and (self.session.pipeline is None or not self.session.pipeline.is_running):
+            self.done.set()
+
+    def stop(self):
+        self.stop_requested.set()
+        self.sample()
+        self.session.stop_camera()
+        self.session.close_recorder()
+
+    def report(self, wall_seconds):
+        stages = self.stats.summary()
+        frames_stage = 'emit' if self.landmarks else 'flip'
+        frames = stages.get(frames_stage, {}).get('count', 0)
+        cpu = sum(self.cpu.values()) if self.cpu else None
+        # Above 1.0 when ROI misses fell back to full-frame reacquisition on the same frame
+        inference_calls = stages.get('inference', {}).get('count', 0)
+        return {
+            'session': self.session.session_id,
+            'input': self.path,
+            'frames': frames,
+            'fps': frames / wall_seconds if wall_seconds else 0.0,
+            'dropped_frames': self.dropped_frames,
+            'inference_per_frame': inference_calls / frames if frames and not self.landmarks else None,
+            'roi_placements': self.roi_placements,
+            'cpu_seconds': cpu,
+            'cpu_percent': 100 * cpu / wall_seconds if cpu is not None and wall_seconds else None,
+            'stages': stages,
+        }
+
+
+def print_report(result):
+    print()
+    print(f"⏱️ {result['wall_seconds']:.1f}s wall, process CPU {result['process_cpu_percent']:.0f}% of one core")
+    for session in result['sessions']:
+        cpu = f"{session['cpu_percent']:.0f}%" if session['cpu_percent'] is not None else "n/a"
+        print()
+        print(f"🧒 {session['session']}: {session['frames']} frames, {session['fps']:.1f} FPS, "
+              f"{session['dropped_frames']} dropped, CPU {cpu}")
+        if session['inference_per_frame'] is not None:
+            print(f"   {session['inference_per_frame']:.2f} inference calls per frame, "
+                  f"{session['roi_placements']} ROI placements")
+        print(f"   {'stage':<14}{'count':>8}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}  (ms)")
+        for stage, stats in session['stages'].items():
+            print(f"   {stage:<14}{stats['count']:>8}{stats['mean_ms']:>9.2f}{stats['p50_ms']:>9.2f}"
+                  f"{stats['p90_ms']:>9.2f}{stats['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game pipeline on recorded input")
+    parser.add_argument('inputs', nargs='+',
+                        help="video files or landmark dumps (.npz or recorder directories); reused round-robin")
+    parser.add_argument('--sessions', type=int, default=1, help="concurrent sessions")
+    parser.add_argument('--max-speed', action='store_true', help="replay as fast as possible instead of real time")
+    parser.add_argument('--duration', type=float, default=None, help="stop after this many seconds")
+    parser.add_argument('--loop', action='store_true', help="loop video inputs (use with --duration)")
+    parser.add_argument('--viewers', type=int, default=0, help="MJPEG viewers per session (adds encode cost)")
+    parser.add_argument('--stream-size', default='960x540',
+                        help="viewer stream size as WIDTHxHEIGHT, or 'full' for the capture resolution")
+    parser.add_argument('--fps', type=float, default=None, help="pipeline frame-rate cap (default 30, or none with --max-speed)")
+    parser.add_argument('--classifier', choices=('angles', 'legacy'), default='angles')
+    parser.add_argument('--no-roi', action='store_true', help="disable ROI tracking")
+    parser.add_argument('--inference-workers', action='store_true', help="run inference in worker processes")
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    parser.add_argument('--record', metavar='DIR', help="record every session's landmarks to DIR")
+    parser.add_argument('--verbose', action='store_true', help="show the server's info logs (game flow, detections)")
+    args = parser.parse_args()
+
+    # Game-flow logs would interleave with the report; they go through the same queue as on the server
+    setup_logging(logging.INFO if args.verbose else logging.WARNING)
+
+    fps = args.fps or (1000.0 if args.max_speed else 30.0)
+    stream_size = None if args.stream_size == 'full' else tuple(int(v) for v in args.stream_size.split('x'))
+    server = GameServer(target_fps=fps, idle_fps=fps, roi_tracking=not args.no_roi,
+                        finger_classifier=args.classifier, inference_workers=args.inference_workers,
+                        stream_size=stream_size, stream_bitrate=None, record_dir=args.record,
+                        max_sessions=args.sessions)
+    server.events.start()
+    server.scheduler.start()
+
+    runs = []
+    for index in range(args.sessions):
+        path = args.inputs[index % len(args.inputs)]
+        session = server.get_session(f"bench-{index}")
+        runs.append(SessionRun(session, path, realtime=not args.max_speed, loop=args.loop, viewers=args.viewers))
+
+    print(f"🚀 Benchmarking {args.sessions} session(s) on {', '.join(args.inputs)}")
+    process_cpu_start = sum(os.times()[:2])
+    start_time = time.perf_counter()
+    for run in runs:
+        if not run.start():
+            print(f"❌ Cannot open {run.path}")
+            run.done.set()
+
+    try:
+        while not all(run.done.is_set() for run in runs):
+            if args.duration and time.perf_counter() - start_time >= args.duration:
+                break
+            for run in runs:
+                run.sample()
+            time.sleep(0.25)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping benchmark...")
+
+    wall_seconds = time.perf_counter() - start_time
+    for run in runs:
+        run.stop()
+    process_cpu = sum(os.times()[:2]) - process_cpu_start
+    server.scheduler.stop()
+    server.events.stop()
+    shutdown_logging()
+
+    result = {
+        'wall_seconds': wall_seconds,
+        'process_cpu_percent': 100 * process_cpu / wall_seconds if wall_seconds else 0.0,
+        'sessions': [run.report(wall_seconds) for run in runs],
+    }
+    print_report(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
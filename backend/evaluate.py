@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""Offline finger-counting evaluation on landmark recordings - no camera, no child.
+
+    python evaluate.py recordings/
+    python evaluate.py recordings/ --classifier angles --classifier server-angles --limit 100000
+    python evaluate.py recordings/ --stabilizer 400/250 --stabilizer 200/100 --json results.json
+    python evaluate.py recordings/ --baseline ci/baseline.json
+
+Reads landmark recorder directories (see src/landmark_recorder.py) chunk by
+chunk through memory maps, so datasets larger than RAM stream through in
+bounded batches. The frames the game was waiting for a number on are labelled
+with that number; for every classifier it reports a confusion matrix per
+expected number, accuracy before and after the gesture stabilizer, how often
+the stable value changes, and classification throughput.
+
+Classifiers:
+    angles, legacy                  vectorized counts (finger_counter batch path)
+    angles-gesture, legacy-gesture  vectorized counting gestures; other finger combinations score as 'unrec'
+    server-angles, server-legacy    GameServer.count_fingers, one frame at a time
+    detector-angles, detector-legacy
+                                    GestureDetector._classify_gesture, one frame at a time
+    package.module:function         function(points, handedness_signs, aspects) -> counts for a
+                                    (N, 21, 3) batch; negative counts mean unrecognized
+
+With --baseline, the run fails (exit code 1) when a classifier's accuracy drops
+or its throughput slows down beyond the given tolerances.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+
+import numpy as np
+
+from src import finger_counter
+from src.gesture_stabilizer import GestureStabilizer
+from src.landmark_packet import HANDEDNESS_LABELS
+from src.landmark_recorder import PHASE_CODES, recording_chunks
+
+NUMBERS = (1, 2, 3, 4, 5)
+NO_HAND, UNRECOGNIZED = -1, -2
+# Confusion matrix columns: prediction + 2
+PREDICTION_LABELS = ('unrec', 'nohand', '0', '1', '2', '3', '4', '5')
+
+# Recording handedness codes -> signs for extended_fingers_invariant (0 unknown, 1 Left, 2 Right)
+HANDEDNESS_SIGNS = np.array([0.0, -1.0, 1.0], dtype=np.float32)
+
+# A gap this long (or time going backwards) means a new recording or camera restart
+STABILIZER_RESET_GAP = 5.0
+
+DEFAULT_CLASSIFIERS = ('angles', 'legacy', 'angles-gesture', 'legacy-gesture')
+
+
+def _gestures(flags):
+    gestures = finger_counter.classify_gesture_batch(flags)
+    return np.where(gestures > 0, gestures, UNRECOGNIZED).astype(np.int8)
+
+
+def _angle_flags(points, handedness, aspect):
+    return finger_counter.extended_fingers_invariant(points, HANDEDNESS_SIGNS[handedness], aspect)
+
+
+BATCH_CLASSIFIERS = {
+    'angles': lambda points, handedness, aspect: _angle_flags(points, handedness, aspect).sum(axis=-1, dtype=np.int8),
+    'legacy': lambda points, handedness, aspect: finger_counter.count_fingers_batch(points),
+    'angles-gesture': lambda points, handedness, aspect: _gestures(_angle_flags(points, handedness, aspect)),
+    'legacy-gesture': lambda points, handedness, aspect: _gestures(finger_counter.extended_fingers(points)),
+}
+
+
+def _per_frame(classify):
+    """Batch wrapper running a one-hand classify(points, handedness label, aspect) frame by frame"""
+    def run(points, handedness, aspect):
+        predictions = np.empty(len(points), dtype=np.int8)
+        for index in range(len(points)):
+            value = classify(points[index], HANDEDNESS_LABELS.get(int(handedness[index])), float(aspect[index]))
+            predictions[index] = UNRECOGNIZED if value is None else value
+        return predictions
+    return run
+
+
+def _server_classifier(variant):
+    # The methods only read finger_classifier, so no Flask app or MediaPipe graph is created
+    from game_server import GameServer
+    server = GameServer.__new__(GameServer)
+    server.finger_classifier = variant
+    return _per_frame(server.count_fingers)
+
+
+def _detector_classifier(variant):
+    from src.gesture_detector import GestureDetector
+    detector = GestureDetector.__new__(GestureDetector)
+    detector.finger_classifier = variant
+    return _per_frame(lambda points, handedness, aspect: detector._classify_gesture(
+        detector._count_extended_fingers(points, handedness, aspect)))
+
+
+def load_classifier(name):
+    if name in BATCH_CLASSIFIERS:
+        return BATCH_CLASSIFIERS[name]
+    kind, _, variant = name.partition('-')
+    if kind == 'server' and variant in ('angles', 'legacy'):
+        return _server_classifier(variant)
+    if kind == 'detector' and variant in ('angles', 'legacy'):
+        return _detector_classifier(variant)
+    if ':' in name:
+        module, _, function = name.partition(':')
+        custom = getattr(importlib.import_module(module), function)
+
+        def run(points, handedness, aspect):
+            counts = np.asarray(custom(points, HANDEDNESS_SIGNS[handedness], aspect))
+            # Not narrowed to int8 here, so out-of-range counts reach the range check instead of wrapping
+            return np.where(counts >= 0, counts, UNRECOGNIZED)
+        return run
+    raise ValueError(f"Unknown classifier {name!r}")
+
+
+def parse_stabilizer(value):
+    """'400/250' -> (window_ms, dwell_ms)"""
+    window, _, dwell = value.partition('/')
+    return float(window), float(dwell or 0)
+
+
+class StabilizerReplay:
+    """Runs per-frame predictions through a GestureStabilizer and scores its stable output"""
+
+    def __init__(self, window_ms, dwell_ms):
+        self.label = f"{window_ms:g}/{dwell_ms:g}"
+        self.stabilizer = GestureStabilizer(window_ms=window_ms, min_dwell_ms=dwell_ms)
+        self.last_timestamp = None
+        self.confusion = np.zeros((len(NUMBERS), len(PREDICTION_LABELS)), dtype=np.int64)
+        self.transitions = 0
+
+    def run(self, predictions, timestamps):
+        """Stable value (prediction code, NO_HAND for none) after every frame"""
+        stable = np.empty(len(predictions), dtype=np.int8)
+        stabilizer = self.stabilizer
+        for index, (prediction, timestamp) in enumerate(zip(predictions.tolist(), timestamps.tolist())):
+            if self.last_timestamp is not None and not 0 <= timestamp - self.last_timestamp < STABILIZER_RESET_GAP:
+                stabilizer.reset()
+            self.last_timestamp = timestamp
+
+            if stabilizer.update(None if prediction == NO_HAND else prediction, timestamp):
+                self.transitions += 1
+            stable[index] = NO_HAND if stabilizer.current is None else stabilizer.current
+        return stable
+
+
+class ClassifierResult:
+    """Accumulated scores of one classifier across all chunks"""
+
+    def __init__(self, name, classify, stabilizers):
+        self.name = name
+        self.classify = classify
+        self.confusion = np.zeros((len(NUMBERS), len(PREDICTION_LABELS)), dtype=np.int64)
+        self.stabilizers = [StabilizerReplay(window, dwell) for window, dwell in stabilizers]
+        self.hand_frames = 0
+        self.seconds = 0.0
+        self.raw_transitions = 0
+        self._last_prediction = None
+
+    def update(self, batch, labelled, expected):
+        present = batch['present']
+        predictions = np.full(len(present), NO_HAND, dtype=np.int8)
+
+        start = time.perf_counter()
+        if present.any():
+            counts = np.asarray(self.classify(batch['points'][present], batch['handedness'][present],
+                                              batch['aspect'][present]))
+            self.seconds += time.perf_counter() - start
+            check_predictions(self.name, counts, int(present.sum()))
+            predictions[present] = counts
+        self.hand_frames += int(present.sum())
+
+        changes = np.count_nonzero(predictions[1:] != predictions[:-1])
+        if self._last_prediction is not None and len(predictions):
+            changes += int(predictions[0] != self._last_prediction)
+        self.raw_transitions += int(changes)
+        if len(predictions):
+            self._last_prediction = predictions[-1]
+
+        accumulate(self.confusion, expected, predictions[labelled])
+        for replay in self.stabilizers:
+            stable = replay.run(predictions, batch['timestamps'])
+            accumulate(replay.confusion, expected, stable[labelled])
+
+    def report(self, duration):
+        minutes = duration / 60 if duration else None
+        result = {
+            'hand_frames': self.hand_frames,
+            'frames_per_second': self.hand_frames / self.seconds if self.seconds else None,
+            'accuracy': accuracy(self.confusion),
+            'hand_accuracy': accuracy(self.confusion, hand_only=True),
+            'transitions_per_minute': self.raw_transitions / minutes if minutes else None,
+            'confusion': confusion_dict(self.confusion),
+            'stabilized': {},
+        }
+        for replay in self.stabilizers:
+            result['stabilized'][replay.label] = {
+                'accuracy': accuracy(replay.confusion),
+                'transitions_per_minute': replay.transitions / minutes if minutes else None,
+                'confusion': confusion_dict(replay.confusion),
+            }
+        return result
+
+
+def check_predictions(name, counts, frames):
+    """Reject classifier output that doesn't fit the confusion matrix columns.
+
+    An out-of-range count would silently land in another expected number's row.
+    """
+    if counts.shape != (frames,):
+        raise ValueError(f"Classifier {name!r} returned shape {counts.shape} for {frames} frames")
+    out_of_range = counts[(counts < UNRECOGNIZED) | (counts > max(NUMBERS))]
+    if len(out_of_range):
+        raise ValueError(f"Classifier {name!r} returned counts outside {UNRECOGNIZED}..{max(NUMBERS)}: "
+                         f"{out_of_range[:5].tolist()}")
+
+
+def accumulate(confusion, expected, predictions):
+    """Add (expected number, prediction) pairs to a confusion matrix"""
+    cells = (expected.astype(np.int64) - 1) * len(PREDICTION_LABELS) + predictions.astype(np.int64) + 2
+    confusion += np.bincount(cells, minlength=confusion.size).reshape(confusion.shape)
+
+
+def accuracy(confusion, hand_only=False):
+    """Share of labelled frames predicted as their expected number (optionally only frames with a hand)"""
+    correct = sum(confusion[row, number + 2] for row, number in enumerate(NUMBERS))
+    total = confusion.sum() - (confusion[:, NO_HAND + 2].sum() if hand_only else 0)
+    return correct / total if total else None
+
+
+def confusion_dict(confusion):
+    return {str(number): dict(zip(PREDICTION_LABELS, map(int, confusion[row])))
+            for row, number in enumerate(NUMBERS)}
+
+
+def iter_batches(path, batch_size, limit=None):
+    """Memory-mapped recording chunks, sliced into batches of at most batch_size frames"""
+    remaining = limit
+    for chunk in recording_chunks(path):
+        for begin in range(0, len(chunk['timestamps']), batch_size):
+            if remaining is not None and remaining <= 0:
+                return
+            end = begin + batch_size if remaining is None else begin + min(batch_size, remaining)
+            batch = {name: np.asarray(column[begin:end]) for name, column in chunk.items()}
+            batch['present'] = ~np.isnan(batch['points']).any(axis=(1, 2))
+            if remaining is not None:
+                remaining -= len(batch['timestamps'])
+            yield batch
+
+
+def evaluate(paths, classifiers, stabilizers, batch_size, limit=None, include_not_waiting=False):
+    results = [ClassifierResult(name, load_classifier(name), stabilizers) for name in classifiers]
+    frames = labelled_frames = 0
+    duration = 0.0
+    counting = PHASE_CODES['counting_game']
+
+    for path in paths:
+        last_timestamp = None
+        for batch in iter_batches(path, batch_size, limit and limit - frames):
+            labelled = (batch['phase'] == counting) & (batch['expected'] > 0)
+            if not include_not_waiting:
+                labelled &= batch['waiting']
+            expected = batch['expected'][labelled]
+
+            for result in results:
+                result.update(batch, labelled, expected)
+
+            # Recorded time, skipping gaps between recordings
+            timestamps = batch['timestamps']
+            steps = np.diff(timestamps if last_timestamp is None else np.concatenate([[last_timestamp], timestamps]))
+            duration += float(steps[(steps > 0) & (steps < STABILIZER_RESET_GAP)].sum())
+            if len(timestamps):
+                last_timestamp = timestamps[-1]
+
+            frames += len(timestamps)
+            labelled_frames += int(labelled.sum())
+
+    return {
+        'inputs': list(paths),
+        'frames': frames,
+        'labelled_frames': labelled_frames,
+        'recorded_seconds': duration,
+        'classifiers': {result.name: result.report(duration) for result in results},
+    }
+
+
+def _percent(value):
+    return f"{100 * value:.1f}%" if value is not None else "n/a"
+
+
+def print_confusion(confusion):
+    print(f"      expected {''.join(f'{label:>8}' for label in PREDICTION_LABELS)}")
+    for number, row in confusion.items():
+        print(f"      {number:>8} {''.join(f'{row[label]:>8}' for label in PREDICTION_LABELS)}")
+
+
+def print_report(result):
+    print()
+    print(f"📊 {result['frames']} frames ({result['labelled_frames']} labelled), "
+          f"{result['recorded_seconds'] / 60:.1f} min recorded")
+    for name, scores in result['classifiers'].items():
+        fps = f"{scores['frames_per_second']:,.0f}" if scores['frames_per_second'] else "n/a"
+        flicker = scores['transitions_per_minute']
+        print()
+        print(f"🔢 {name}: accuracy {_percent(scores['accuracy'])} "
+              f"(hand visible {_percent(scores['hand_accuracy'])}), {fps} frames/s")
+        if flicker is not None:
+            print(f"   raw: {flicker:.1f} changes/min")
+        for label, stable in scores['stabilized'].items():
+            flicker = stable['transitions_per_minute']
+            changes = f", {flicker:.1f} changes/min" if flicker is not None else ""
+            print(f"   stabilizer {label} ms: accuracy {_percent(stable['accuracy'])}{changes}")
+        print_confusion(scores['confusion'])
+
+
+def compare_to_baseline(result, baseline, max_accuracy_drop, max_slowdown):
+    """Regression messages for classifiers that got less accurate or slower than the baseline"""
+    regressions = []
+    for name, scores in result['classifiers'].items():
+        reference = baseline.get('classifiers', {}).get(name)
+        if reference is None:
+            continue
+        if reference['accuracy'] is not None and scores['accuracy'] is not None:
+            if scores['accuracy'] < reference['accuracy'] - max_accuracy_drop:
+                regressions.append(f"{name}: accuracy {_percent(scores['accuracy'])} "
+                                   f"< baseline {_percent(reference['accuracy'])}")
+        if reference['frames_per_second'] and scores['frames_per_second']:
+            if scores['frames_per_second'] < reference['frames_per_second'] * (1 - max_slowdown):
+                regressions.append(f"{name}: {scores['frames_per_second']:,.0f} frames/s "
+                                   f"< baseline {reference['frames_per_second']:,.0f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate finger-counting accuracy and speed on landmark recordings")
+    parser.add_argument('inputs', nargs='+', help="landmark recorder directories (or directories of them)")
+    parser.add_argument('--classifier', action='append', dest='classifiers', metavar='NAME',
+                        help=f"classifier to evaluate, repeatable (default: {', '.join(DEFAULT_CLASSIFIERS)})")
+    parser.add_argument('--stabilizer', action='append', dest='stabilizers', metavar='WINDOW/DWELL',
+                        help="gesture stabilizer window/dwell in ms to replay, repeatable (default: 400/250)")
+    parser.add_argument('--include-not-waiting', action='store_true',
+                        help="also label counting-game frames where the game was not waiting for a gesture")
+    parser.add_argument('--batch-size', type=int, default=65536, help="frames classified per batch")
+    parser.add_argument('--limit', type=int, default=None, help="stop after this many frames")
+    parser.add_argument('--json', metavar='PATH', help="also write the results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="results JSON to compare against; exit 1 on regression")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01, help="allowed accuracy drop vs baseline")
+    parser.add_argument('--max-slowdown', type=float, default=0.25, help="allowed throughput drop vs baseline")
+    args = parser.parse_args()
+
+    classifiers = args.classifiers or list(DEFAULT_CLASSIFIERS)
+    stabilizers = [parse_stabilizer(value) for value in (args.stabilizers or ['400/250'])]
+
+    print(f"🧪 Evaluating {', '.join(classifiers)} on {', '.join(args.inputs)}")
+    try:
+        result = evaluate(args.inputs, classifiers, stabilizers, args.batch_size, args.limit,
+                          args.include_not_waiting)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if not result['frames']:
+        print("❌ No recorded frames found")
+        sys.exit(1)
+    print_report(result)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(result, baseline, args.max_accuracy_drop, args.max_slowdown)
+        if regressions:
+            print("\n❌ Regressions against the baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
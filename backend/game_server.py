@@ -1,17 +1,56 @@
 #!/usr/bin/env python3
 
+import logging
+import math
+import re
 import threading
-import time
 import base64
-from flask import Flask, render_template, Response
-from flask_socketio import SocketIO, emit
-import cv2
+from flask import Flask, render_template, Response, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import mediapipe as mp
 import numpy as np
 import os
+import sys
+
+from src import finger_counter
+from src.camera_registry import CameraRegistry
+from src.event_bus import EventBus
+from src.game_logging import log_fields, logging_stats, setup_logging, shutdown_logging
+from src.game_scheduler import GameScheduler
+from src.inference_worker import RemoteHands
+from src.metrics import MetricsRegistry
+from src.video_channel import VideoChannel
+
+from game_session import GameSession
+
+DEFAULT_SESSION_ID = 'default'
+
+# Session ids come from clients and name rooms, timer groups and recording directories
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Limits for the client-chosen binary video frame rate and bitrate
+VIDEO_FPS_RANGE = (1.0, 60.0)
+VIDEO_KBPS_RANGE = (100, 20000)
+
+logger = logging.getLogger(__name__)
+
+
+def bounded_number(value, name, low, high):
+    """A client-supplied number clamped to [low, high]; None when absent, ValueError unless a positive number"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+        raise ValueError(f"{name} must be a positive number, got {str(value)[:40]!r}")
+    return min(max(value, low), high)
+
 
 class GameServer:
-    def __init__(self, port=5000):
+    def __init__(self, port=5000, target_fps=20.0, idle_fps=5.0, idle_after=3.0, roi_tracking=True,
+                 finger_classifier='angles', stabilizer_window_ms=400, stabilizer_dwell_ms=250,
+                 event_window=0.1, inference_workers=False, capture_resolution='max',
+                 max_inference_size=(1280, 720), stream_size=(960, 540), stream_encoder='auto',
+                 stream_bitrate=3_000_000, overlay='server', record_dir=None, record_chunk_frames=9000,
+                 record_max_bytes=1 << 30, max_sessions=16):
         # Set up Flask with proper static file handling
         frontend_dir = os.path.join(os.path.dirname(__file__), '..', 'frontend')
         self.app = Flask(__name__,
@@ -21,27 +60,82 @@ class GameServer:
         self.socketio = SocketIO(self.app, cors_allowed_origins="*")
         self.port = port
 
-        # Gesture detection components
-        self.cap = None
+        # All server-initiated events go through the bus; gesture updates are coalesced per tick
+        self.events = EventBus(self.socketio.emit, window=event_window)
+
+        # Single thread running every game-flow timer, with cancellable handles
+        self.scheduler = GameScheduler()
+
+        # Cached, parallel camera discovery; only new or replugged devices are probed
+        self.camera_registry = CameraRegistry()
+
+        # Capture mode policy: 'max' (largest the camera offers), 'inference' (smallest
+        # covering max_inference_size) or an explicit (width, height)
+        self.capture_resolution = capture_resolution
+        self.max_inference_size = max_inference_size
+
+        # MJPEG viewers get frames downscaled to fit stream_size (None = capture resolution);
+        # /video_feed?full=1 still streams the full capture resolution
+        self.stream_size = stream_size
+
+        # JPEG encoder ('auto' prefers libjpeg-turbo bindings when installed) and the per-viewer
+        # bandwidth target the stream adapts quality and frame rate to (None = fixed quality)
+        self.stream_encoder = stream_encoder
+        self.stream_bitrate = stream_bitrate
+
+        # Hand skeleton overlay: 'server' (drawn into the stream), 'client' (landmark packets
+        # for a canvas overlay) or 'none'
+        self.overlay = overlay
+
+        # Opt-in landmark recording for offline tuning: every observed frame with its count and game
+        # state goes to <record_dir>/<session>/<start time> (see src/landmark_recorder.py)
+        self.record_dir = record_dir
+        self.record_chunk_frames = record_chunk_frames
+        self.record_max_bytes = record_max_bytes
+
+        # Stage timing hooks hook(stage, seconds) copied into every new session (see src/stage_timer.py)
+        self.stage_hooks = []
+
+        # Prometheus metrics served at /metrics: stage latency histograms plus gauges read on scrape
+        self.metrics = MetricsRegistry()
+        self.metrics.describe('stage_seconds', 'histogram', 'Frame path stage latency in seconds')
+        self.metrics.describe('landmark_packets_rejected_total', 'counter', 'Client landmark packets that failed to decode')
+        self.metrics.describe('sessions_rejected_total', 'counter', 'Session joins refused, by reason')
+        self.metrics.describe('sessions_closed_total', 'counter', 'Idle sessions closed after their last client left')
+        self.metrics.add_collector(self.collect_metrics)
+        self.stage_hooks.append(self.metrics.observe_stage)
+
+        # Binary Socket.IO video for clients that subscribe instead of opening /video_feed.
+        # Frames go straight to one client with an ack each, so they bypass the event bus.
+        self.video_channel = VideoChannel(self.socketio)
+
+        # MediaPipe modules shared by every session; each session owns its own Hands graph
         self.mp_hands = mp.solutions.hands
-        self.hands = None
         self.mp_draw = mp.solutions.drawing_utils
-        self.camera_thread = None
-        self.is_running = False
-        self.current_camera_index = 0
-
-        # Game state
-        self.last_detected_number = None
-        self.detection_confidence = 0.0
-
-        # Game flow state
-        self.game_phase = 'technical_setup'  # technical_setup, user_setup, counting_game, completed
-        self.current_number = 1
-        self.numbers_completed = []
-        self.waiting_for_gesture = False
-        self.gesture_timeout_timer = None
-        self.hand_detected = False
-        self.game_start_time = None
+
+        # Inference pacing: full rate while a hand is in view, idle rate otherwise
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+
+        # Run inference on a crop around the tracked hand instead of the whole frame
+        self.roi_tracking = roi_tracking
+
+        # 'angles' (handedness- and rotation-invariant) or 'legacy' (POC tip-vs-joint heuristics)
+        self.finger_classifier = finger_classifier
+
+        # Run each session's MediaPipe graph in its own worker process (multi-camera hosts)
+        self.inference_workers = inference_workers
+
+        # Gesture stabilizer settings used by every session
+        self.stabilizer_window_ms = stabilizer_window_ms
+        self.stabilizer_dwell_ms = stabilizer_dwell_ms
+
+        # One GameSession per station, keyed by session id (also its Socket.IO room)
+        self.sessions = {}
+        self.client_sessions = {}  # Socket.IO sid -> session id
+        self.max_sessions = max_sessions  # new session ids beyond this are refused (the default session never is)
+        self.sessions_lock = threading.Lock()
 
         self.setup_routes()
         self.setup_socketio_events()
@@ -53,535 +147,309 @@ class GameServer:
 
         @self.app.route('/video_feed')
         def video_feed():
-            return Response(self.generate_video_frames(),
+            session = self.sessions.get(request.args.get('session', DEFAULT_SESSION_ID))
+            full_resolution = request.args.get('full') == '1'
+            kbps = request.args.get('kbps', type=int)
+            target_bitrate = kbps * 1000 if kbps else None
+            frames = session.generate_video_frames(full_resolution, target_bitrate) if session else iter(())
+            return Response(frames,
                           mimetype='multipart/x-mixed-replace; boundary=frame')
 
+        @self.app.route('/metrics')
+        def metrics():
+            return Response(self.metrics.render(), mimetype='text/plain; version=0.0.4')
+
     def setup_socketio_events(self):
         @self.socketio.on('connect')
         def handle_connect():
-            print(f"🔌 Client connected")
+            logger.info("🔌 Client connected", extra=log_fields(sid=request.sid))
             emit('server_status', {'status': 'connected', 'message': 'Welcome to Toddler Counting Game!'})
 
         @self.socketio.on('disconnect')
         def handle_disconnect():
-            print(f"🔌 Client disconnected")
+            logger.info("🔌 Client disconnected", extra=log_fields(sid=request.sid))
+            self.video_channel.unsubscribe(request.sid)
+            with self.sessions_lock:
+                session_id = self.client_sessions.pop(request.sid, None)
+            if session_id is not None:
+                self.release_session(session_id)
+
+        @self.socketio.on('join_session')
+        def handle_join_session(data=None):
+            session_id = str((data or {}).get('session_id') or DEFAULT_SESSION_ID)
+            session = self.join_session(session_id)
+            if session is None:
+                emit('session_error', {'session_id': session_id[:80],
+                                       'message': 'Invalid session id or too many sessions'})
+                return
+            emit('session_joined', {'session_id': session_id, 'phase': session.game_phase})
 
         @self.socketio.on('start_camera')
         def handle_start_camera(data):
+            session = self.current_session()
             camera_index = data.get('camera_index', 0)
-            print(f"📹 Starting camera {camera_index}")
+            session.log.info("📹 Starting camera %s", camera_index)
 
-            if self.start_camera(camera_index):
+            if session.start_camera(camera_index):
                 emit('camera_status', {'status': 'started', 'camera_index': camera_index})
-                self.start_gesture_detection()
+                session.start_gesture_detection()
 
                 # Automatically start user setup phase after camera starts (give more time for audio setup)
-                threading.Timer(4.0, self.start_user_setup_phase).start()
+                session.call_later(4.0, session.start_user_setup_phase)
             else:
                 emit('camera_status', {'status': 'error', 'message': f'Cannot open camera {camera_index}'})
 
+        @self.socketio.on('start_landmark_input')
+        def handle_start_landmark_input(data=None):
+            session = self.current_session()
+            session.log.info("📡 Switching to client landmark input")
+            session.start_client_input()
+            emit('camera_status', {'status': 'started', 'source': 'client'})
+
+            # Same greeting delay as a camera start
+            session.call_later(4.0, session.start_user_setup_phase)
+
+        @self.socketio.on('landmarks')
+        def handle_landmarks(data):
+            try:
+                self.current_session().process_landmark_packet(data)
+            except ValueError as e:
+                self.metrics.inc('landmark_packets_rejected_total')
+                emit('landmark_error', {'message': str(e)})
+
         @self.socketio.on('stop_camera')
         def handle_stop_camera(data=None):
-            print("📹 Stopping camera")
-            self.stop_camera()
+            logger.info("📹 Stopping camera")
+            self.current_session().stop_camera()
             emit('camera_status', {'status': 'stopped'})
 
+        @self.socketio.on('subscribe_video')
+        def handle_subscribe_video(data=None):
+            data = data or {}
+            sid = request.sid
+            self.current_session()  # joins the default session if the client never joined one
+            try:
+                kbps = bounded_number(data.get('kbps'), 'kbps', *VIDEO_KBPS_RANGE)
+                fps = bounded_number(data.get('fps'), 'fps', *VIDEO_FPS_RANGE)
+            except ValueError as e:
+                emit('video_error', {'message': str(e)})
+                return
+            logger.info("📺 Binary video requested (%s fps)", fps or 'full', extra=log_fields(sid=sid))
+            self.video_channel.subscribe(
+                sid,
+                lambda: self.broadcaster_for(sid),
+                full_resolution=bool(data.get('full')),
+                target_bitrate=int(kbps * 1000) if kbps else None,
+                max_fps=float(fps) if fps else None
+            )
+
+        @self.socketio.on('unsubscribe_video')
+        def handle_unsubscribe_video(data=None):
+            self.video_channel.unsubscribe(request.sid)
+
         @self.socketio.on('request_camera_test')
         def handle_camera_test(data=None):
-            print("🔍 Testing available cameras")
-            available_cameras = self.find_available_cameras()
-            emit('camera_list', {'cameras': available_cameras})
+            logger.info("🔍 Testing available cameras")
+            # An explicit test re-probes every free camera, including ones cached as unusable.
+            # Probing can take seconds on a new device - answer from a background task
+            sid = request.sid
+            self.socketio.start_background_task(self.send_camera_list, sid, True)
 
         # Game Flow Events
         @self.socketio.on('start_user_setup')
         def handle_start_user_setup(data=None):
-            print("🎮 Starting user setup phase")
-            self.start_user_setup_phase()
+            logger.info("🎮 Starting user setup phase")
+            self.current_session().start_user_setup_phase()
 
         @self.socketio.on('hand_detected')
         def handle_hand_detected(data=None):
-            print("👋 Hand detected, transitioning to counting game")
-            self.hand_detected = True
-            self.start_counting_game()
+            logger.info("👋 Hand detected, transitioning to counting game")
+            session = self.current_session()
+            session.hand_detected = True
+            session.start_counting_game()
 
         @self.socketio.on('audio_finished')
         def handle_audio_finished(data):
             audio_file = data.get('file', '')
-            print(f"🔊 Audio finished: {audio_file}")
-            self.handle_audio_completed(audio_file)
+            logger.info("🔊 Audio finished: %s", audio_file)
+            self.current_session().handle_audio_completed(audio_file)
 
         @self.socketio.on('restart_game')
         def handle_restart_game(data=None):
-            print("🔄 Restarting game")
-            self.restart_game()
-
-    def find_available_cameras(self):
-        """Find available camera indices"""
+            logger.info("🔄 Restarting game")
+            self.current_session().restart_game()
+
+    # Session Management Methods
+    def get_session(self, session_id):
+        """Return the session with this id, creating it on first use (None once max_sessions exist)"""
+        with self.sessions_lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                if len(self.sessions) >= self.max_sessions and session_id != DEFAULT_SESSION_ID:
+                    logger.warning("❌ Refusing session %s, %d sessions already running", session_id,
+                                   len(self.sessions))
+                    self.metrics.inc('sessions_rejected_total', reason='limit')
+                    return None
+                logger.info("🧒 Creating session %s", session_id)
+                session = GameSession(self, session_id)
+                self.sessions[session_id] = session
+            return session
+
+    def join_session(self, session_id):
+        """Move the calling Socket.IO client into a session's room, or return None if it can't join"""
+        if not SESSION_ID_PATTERN.match(session_id):
+            logger.warning("❌ Rejected malformed session id %r", session_id[:80], extra=log_fields(sid=request.sid))
+            self.metrics.inc('sessions_rejected_total', reason='invalid_id')
+            return None
+
+        session = self.get_session(session_id)
+        if session is None:
+            return None
+
+        with self.sessions_lock:
+            previous = self.client_sessions.get(request.sid)
+            self.client_sessions[request.sid] = session_id
+
+        if previous is not None and previous != session_id:
+            leave_room(previous)
+            self.release_session(previous)
+        join_room(session_id)
+        logger.info("🧒 Client joined session %s", session_id, extra=log_fields(sid=request.sid))
+        return session
+
+    def release_session(self, session_id):
+        """Drop a session once no client is in it and its camera is off"""
+        with self.sessions_lock:
+            session = self.sessions.get(session_id)
+            if (session is None or session.cap is not None
+                    or session_id in self.client_sessions.values()):
+                return
+            del self.sessions[session_id]
+
+        logger.info("🧒 Closing idle session %s", session_id)
+        self.metrics.inc('sessions_closed_total')
+        session.close()
+
+    def current_session(self):
+        """Session of the calling client; clients that never joined use the default session"""
+        session_id = self.client_sessions.get(request.sid)
+        if session_id is None:
+            return self.join_session(DEFAULT_SESSION_ID)
+        return self.get_session(session_id)
+
+    def broadcaster_for(self, sid):
+        """MJPEG broadcaster of the session a client is in, or None while its camera is off"""
+        session = self.sessions.get(self.client_sessions.get(sid, DEFAULT_SESSION_ID))
+        return session.broadcaster if session else None
+
+    def camera_owner(self, camera_index):
+        """Session currently holding a camera index, or None"""
+        with self.sessions_lock:
+            for session in self.sessions.values():
+                if session.cap is not None and session.current_camera_index == camera_index:
+                    return session
+        return None
+
+    def in_use_cameras(self):
+        """Camera indices currently held open by a session"""
+        with self.sessions_lock:
+            return {session.current_camera_index for session in self.sessions.values() if session.cap is not None}
+
+    def find_available_cameras(self, force=False):
+        """Find available cameras through the registry, probing only devices not already cached unless forced"""
         available_cameras = []
-        for i in range(5):  # Test cameras 0-4
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                ret, _ = cap.read()
-                if ret:
-                    # Try to set Full HD and get actual resolution
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-                    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-                    # If we didn't get Full HD, try 720p
-                    if width < 1920 or height < 1080:
-                        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-                        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-                        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-                    available_cameras.append({
-                        'index': i,
-                        'resolution': f"{width}x{height}",
-                        'name': f"Camera {i}"
-                    })
-                cap.release()
+        for camera in self.camera_registry.get_cameras(in_use=self.in_use_cameras(), force=force):
+            width, height = camera['resolutions'][0]
+            available_cameras.append({
+                'index': camera['index'],
+                'resolution': f"{width}x{height}",
+                'resolutions': [f"{w}x{h}" for w, h in camera['resolutions']],
+                'name': camera['name']
+            })
         return available_cameras
 
-    def start_camera(self, camera_index):
-        """Initialize camera capture with Full HD resolution (from POC)"""
-        if self.cap is not None:
-            self.stop_camera()
-
-        self.cap = cv2.VideoCapture(camera_index)
-        if not self.cap.isOpened():
-            return False
-
-        # Try to set Full HD resolution first (exactly like POC)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-
-        # Check what resolution we actually got
-        actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        print(f"📺 Camera resolution: {actual_width}x{actual_height}")
-
-        # If we didn't get Full HD, try 720p
-        if actual_width < 1920 or actual_height < 1080:
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-            actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            print(f"📺 Fallback to: {actual_width}x{actual_height}")
-
-        # Last resort: VGA
-        if actual_width < 1280 or actual_height < 720:
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            print(f"📺 Using VGA: {actual_width}x{actual_height}")
-
-        # Initialize MediaPipe hands
-        self.hands = self.mp_hands.Hands(
+    def send_camera_list(self, sid=None, force=False):
+        """Emit the camera list to one client, or to everyone when sid is None (force re-probes every camera)"""
+        self.events.emit('camera_list', {'cameras': self.find_available_cameras(force)}, to=sid)
+
+    def collect_metrics(self):
+        """Scrape-time metrics for /metrics, read from the live sessions and services"""
+        with self.sessions_lock:
+            sessions = list(self.sessions.values())
+
+        counters = {session.session_id: session.frame_counters() for session in sessions}
+        frame_metrics = [
+            (name, 'counter', help_text,
+             [({'session': session_id}, values[key]) for session_id, values in counters.items()])
+            for name, key, help_text in (
+                ('frames_processed_total', 'frames_processed', 'Frames run through the pipeline'),
+                ('frames_dropped_total', 'frames_dropped', 'Captured frames the pipeline never read'),
+                ('timestamp_mismatches_total', 'timestamp_mismatches', 'Frames skipped on MediaPipe timestamp mismatch'),
+            )
+        ]
+
+        viewers = [({'session': session.session_id},
+                    session.broadcaster.viewer_count if session.broadcaster else 0) for session in sessions]
+        scheduler_alive = bool(self.scheduler.thread and self.scheduler.thread.is_alive())
+        log_stats = logging_stats()
+        recording = [session for session in sessions if session.recorder is not None]
+
+        return frame_metrics + [
+            ('events_emitted_total', 'counter', 'Socket.IO events emitted by the server',
+             [({'event': event}, count) for event, count in sorted(self.events.emit_counts.items())]),
+            ('sessions', 'gauge', 'Game sessions on this server', [({}, len(sessions))]),
+            ('cameras_running', 'gauge', 'Sessions with a running camera pipeline',
+             [({}, sum(1 for session in sessions if session.pipeline and session.pipeline.is_running))]),
+            ('mjpeg_viewers', 'gauge', 'Connected /video_feed viewers', viewers),
+            ('video_channel_subscribers', 'gauge', 'Clients on the binary Socket.IO video channel',
+             [({}, self.video_channel.subscriber_count)]),
+            ('timers_pending', 'gauge', 'Game-flow timers waiting to fire', [({}, self.scheduler.pending_count)]),
+            ('timer_thread_alive', 'gauge', 'Whether the game scheduler thread is running', [({}, int(scheduler_alive))]),
+            ('threads', 'gauge', 'Python threads alive in the server process', [({}, threading.active_count())]),
+            ('landmark_frames_recorded_total', 'counter', 'Frames appended to landmark recordings',
+             [({'session': session.session_id}, session.recorder.frames_recorded) for session in recording]),
+            ('landmark_chunks_dropped_total', 'counter', 'Landmark recording chunks lost to writer backlog or errors',
+             [({'session': session.session_id}, session.recorder.chunks_dropped) for session in recording]),
+            ('log_records_dropped_total', 'counter', 'Log records dropped because the log queue was full',
+             [({}, log_stats['dropped'])]),
+            ('log_records_sampled_total', 'counter', 'High-frequency log records suppressed by sampling',
+             [({}, log_stats['suppressed'])]),
+        ]
+
+    def create_hands(self):
+        """Create a Hands graph for one session, in-process or in a dedicated worker process"""
+        hands_kwargs = dict(
             static_image_mode=False,
             max_num_hands=1,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
-
-        self.current_camera_index = camera_index
-        return True
-
-    def stop_camera(self):
-        """Stop camera capture and cleanup"""
-        self.is_running = False
-
-        if self.camera_thread and self.camera_thread.is_alive():
-            self.camera_thread.join()
-
-        if self.cap:
-            self.cap.release()
-            self.cap = None
-
-        if self.hands:
-            self.hands.close()
-            self.hands = None
-
-    def count_fingers(self, landmarks):
-        """Simple finger counting (from POC)"""
-        finger_tips = [4, 8, 12, 16, 20]
-        finger_pips = [3, 6, 10, 14, 18]
-
-        fingers = []
-
-        # Thumb
-        if landmarks[4].x > landmarks[3].x:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-
-        # Other fingers
-        for i in range(1, 5):
-            if landmarks[finger_tips[i]].y < landmarks[finger_pips[i]].y:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-
-        return sum(fingers)
-
-    def start_gesture_detection(self):
-        """Start gesture detection in a separate thread"""
-        if self.camera_thread and self.camera_thread.is_alive():
-            return
-
-        self.is_running = True
-        self.camera_thread = threading.Thread(target=self._gesture_detection_loop)
-        self.camera_thread.daemon = True
-        self.camera_thread.start()
-
-    def _gesture_detection_loop(self):
-        """Main gesture detection loop"""
-        print("🤖 Starting gesture detection loop")
-
-        while self.is_running and self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                print("❌ Failed to read frame")
-                break
-
-            # Flip frame horizontally for mirror effect
-            frame = cv2.flip(frame, 1)
-
-            # Convert BGR to RGB for MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Process with MediaPipe with error handling
-            try:
-                results = self.hands.process(rgb_frame)
-            except ValueError as e:
-                if "Packet timestamp mismatch" in str(e):
-                    print("⚠️ MediaPipe timestamp mismatch, skipping frame")
-                    time.sleep(0.1)  # Brief pause to reset timing
-                    continue
-                else:
-                    print(f"❌ MediaPipe error: {e}")
-                    break
-
-            finger_count = 0
-            confidence = 0.0
-
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    finger_count = self.count_fingers(hand_landmarks.landmark)
-                    confidence = 0.95  # Simplified confidence for now
-
-                    # Handle hand detection during user setup phase
-                    if self.game_phase == 'user_setup' and not self.hand_detected:
-                        print("👋 Hand detected during user setup, starting counting game")
-                        self.hand_detected = True
-                        self.start_counting_game()
-
-                    # Only emit if it's a valid counting number (1-5 for this game)
-                    if 1 <= finger_count <= 5:
-                        # Only send if the number changed
-                        if finger_count != self.last_detected_number:
-                            print(f"🔢 Detected: {finger_count} fingers")
-                            self.socketio.emit('gesture_detected', {
-                                'number': finger_count,
-                                'confidence': confidence,
-                                'timestamp': time.time()
-                            })
-                            self.last_detected_number = finger_count
-
-                            # Check for correct gesture during counting game
-                            if self.game_phase == 'counting_game' and self.waiting_for_gesture:
-                                self.handle_correct_gesture(finger_count)
-            else:
-                # No hand detected
-                if self.last_detected_number is not None:
-                    print("👋 No hand detected")
-                    self.socketio.emit('gesture_lost', {
-                        'timestamp': time.time()
-                    })
-                    self.last_detected_number = None
-
-            # Small delay to prevent overwhelming the connection
-            time.sleep(0.05)  # ~20 FPS
-
-        print("🤖 Gesture detection loop ended")
-
-    def generate_video_frames(self):
-        """Generate video frames for streaming (from POC with hand landmarks)"""
-        while self.is_running and self.cap and self.cap.isOpened():
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-
-            # Flip frame horizontally for mirror effect (like POC)
-            frame = cv2.flip(frame, 1)
-
-            # For MediaPipe processing, we'll work with a smaller version for performance
-            # But display the full resolution frame (exactly like POC)
-            processing_frame = frame
-
-            # If frame is larger than 720p, create a smaller version for MediaPipe
-            height, width = frame.shape[:2]
-            if width > 1280 or height > 720:
-                # Calculate scale to fit within 720p while maintaining aspect ratio
-                scale = min(1280/width, 720/height)
-                new_width = int(width * scale)
-                new_height = int(height * scale)
-                processing_frame = cv2.resize(frame, (new_width, new_height))
-
-            # Convert to RGB for MediaPipe
-            rgb = cv2.cvtColor(processing_frame, cv2.COLOR_BGR2RGB)
-
-            # Process with MediaPipe with error handling
-            if self.hands:
-                try:
-                    results = self.hands.process(rgb)
-                except ValueError as e:
-                    if "Packet timestamp mismatch" in str(e):
-                        print("⚠️ MediaPipe timestamp mismatch in video stream, skipping frame")
-                        time.sleep(0.03)
-                        continue
-                    else:
-                        print(f"❌ MediaPipe video error: {e}")
-                        break
-
-                finger_count = 0
-
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        # Draw individual landmark points (from POC)
-                        for landmark in hand_landmarks.landmark:
-                            x_pixel = int(landmark.x * width)
-                            y_pixel = int(landmark.y * height)
-                            cv2.circle(frame, (x_pixel, y_pixel), 5, (0, 255, 0), -1)
-
-                        # Draw connections between landmarks (from POC)
-                        for connection in self.mp_hands.HAND_CONNECTIONS:
-                            start_idx = connection[0]
-                            end_idx = connection[1]
-
-                            start_landmark = hand_landmarks.landmark[start_idx]
-                            end_landmark = hand_landmarks.landmark[end_idx]
-
-                            start_x = int(start_landmark.x * width)
-                            start_y = int(start_landmark.y * height)
-                            end_x = int(end_landmark.x * width)
-                            end_y = int(end_landmark.y * height)
-
-                            cv2.line(frame, (start_x, start_y), (end_x, end_y), (255, 255, 255), 2)
-
-                        # Count fingers (use landmarks from processing frame)
-                        finger_count = self.count_fingers(hand_landmarks.landmark)
-
-                        # Only show numbers 1-10 (expanded from POC)
-                        if 1 <= finger_count <= 10:
-                            # Emit gesture to frontend
-                            self.socketio.emit('gesture_detected', {
-                                'number': finger_count,
-                                'confidence': 0.95,
-                                'timestamp': time.time()
-                            })
-                            self.last_detected_number = finger_count
-                else:
-                    # No hand detected
-                    if self.last_detected_number is not None:
-                        self.socketio.emit('gesture_lost', {'timestamp': time.time()})
-                        self.last_detected_number = None
-
-
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if ret:
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-
-            time.sleep(0.03)  # ~30 FPS
-
-    # Game Flow Management Methods
-    def start_user_setup_phase(self):
-        """Start user setup phase after camera is running"""
-        print("🎮 Starting user setup phase")
-        self.game_phase = 'user_setup'
-        self.hand_detected = False
-
-        # Emit phase change to frontend
-        self.socketio.emit('game_phase_changed', {
-            'phase': 'user_setup',
-            'message': 'Playing greeting audio'
-        })
-
-        # Start the user setup sequence - just play the greeting first
-        self.socketio.emit('play_audio', {'file': 'hi_ready_to_play'})
-
-    def handle_audio_completed(self, audio_file):
-        """Handle when audio playback is completed"""
-        print(f"🔊 Audio completed: {audio_file}")
-
-        if self.game_phase == 'user_setup':
-            if 'hi_ready_to_play' in audio_file:
-                # Wait 2 seconds then play next instruction
-                threading.Timer(2.0, self.play_show_fingers).start()
-            elif 'show_me_your_fingers' in audio_file:
-                # Start monitoring for hand detection
-                self.start_hand_monitoring()
-
-        elif self.game_phase == 'counting_game':
-            if any(num in audio_file for num in ['one', 'two', 'three', 'four', 'five']):
-                # Number audio finished, start 15-second timer
-                self.start_gesture_timeout()
-
-    def play_show_fingers(self):
-        """Play the show fingers instruction"""
-        self.socketio.emit('play_audio', {'file': 'show_me_your_fingers'})
-
-    def start_hand_monitoring(self):
-        """Start monitoring for hand detection during user setup"""
-        print("👋 Monitoring for hand detection...")
-        # The hand detection will be handled by the existing gesture detection loop
-        # When a hand is detected, it will trigger the transition
-
-    def start_counting_game(self):
-        """Start the counting game after hand is detected"""
-        if self.game_phase != 'user_setup':
-            return
-
-        print("🎮 Starting counting game")
-        self.game_phase = 'counting_game'
-        self.current_number = 1
-        self.numbers_completed = []
-
-        # Play "let's start counting" then start with number 1
-        self.socketio.emit('game_phase_changed', {
-            'phase': 'counting_game',
-            'current_number': self.current_number
-        })
-
-        self.socketio.emit('play_audio', {'file': 'lets_start_counting'})
-
-        # After audio finishes, wait a bit longer then start with number 1
-        threading.Timer(5.0, self.start_current_number).start()
-
-    def start_current_number(self):
-        """Start the current number challenge"""
-        print(f"🔢 Starting number {self.current_number}")
-
-        self.waiting_for_gesture = True
-
-        # Emit number started event
-        self.socketio.emit('number_started', {
-            'number': self.current_number,
-            'timeout': 15000  # 15 seconds
-        })
-
-        # Play the number audio immediately
-        self.socketio.emit('play_audio', {'file': f'number_{self.current_number}'})
-
-    def start_gesture_timeout(self):
-        """Start 15-second timeout for gesture detection"""
-        print(f"⏰ Starting 15-second timeout for number {self.current_number}")
-
-        # Cancel any existing timer
-        if self.gesture_timeout_timer:
-            self.gesture_timeout_timer.cancel()
-
-        # Start new timer
-        self.gesture_timeout_timer = threading.Timer(15.0, self.handle_gesture_timeout)
-        self.gesture_timeout_timer.start()
-
-    def handle_gesture_timeout(self):
-        """Handle when gesture timeout expires"""
-        if not self.waiting_for_gesture:
-            return  # Gesture was already detected
-
-        print(f"⏰ Timeout for number {self.current_number}, replaying audio")
-
-        # Replay the number audio
-        self.socketio.emit('play_audio', {'file': f'number_{self.current_number}'})
-
-        # Don't cancel waiting_for_gesture - keep waiting
-        # The timeout will be restarted when audio finishes
-
-    def handle_correct_gesture(self, detected_number):
-        """Handle when correct gesture is detected"""
-        if not self.waiting_for_gesture or detected_number != self.current_number:
-            return
-
-        print(f"✅ Correct gesture detected: {detected_number}")
-
-        # Cancel timeout timer
-        if self.gesture_timeout_timer:
-            self.gesture_timeout_timer.cancel()
-            self.gesture_timeout_timer = None
-
-        self.waiting_for_gesture = False
-
-        # Add to completed numbers
-        self.numbers_completed.append(self.current_number)
-
-        # Emit success event
-        self.socketio.emit('number_success', {
-            'number': self.current_number,
-            'completed': self.numbers_completed
-        })
-
-        # Play random positive feedback
-        self.socketio.emit('play_random_positive_feedback', {})
-
-        # Move to next number after a longer delay to let positive feedback finish
-        if self.current_number < 5:
-            threading.Timer(4.0, self.move_to_next_number).start()
-        else:
-            threading.Timer(4.0, self.complete_game).start()
-
-    def move_to_next_number(self):
-        """Move to the next number in sequence"""
-        self.current_number += 1
-        print(f"➡️ Moving to number {self.current_number}")
-
-        self.socketio.emit('next_number', {
-            'number': self.current_number,
-            'progress': len(self.numbers_completed)
-        })
-
-        # Start the new number
-        self.start_current_number()
-
-    def complete_game(self):
-        """Complete the game when all numbers are done"""
-        print("🎉 Game completed!")
-        self.game_phase = 'completed'
-
-        self.socketio.emit('game_completed', {
-            'numbers_completed': self.numbers_completed,
-            'completion_time': time.time() - self.game_start_time if self.game_start_time else 0
-        })
-
-    def restart_game(self):
-        """Restart the game from the beginning"""
-        print("🔄 Restarting game")
-
-        # Cancel any timers
-        if self.gesture_timeout_timer:
-            self.gesture_timeout_timer.cancel()
-            self.gesture_timeout_timer = None
-
-        # Reset game state
-        self.game_phase = 'technical_setup'
-        self.current_number = 1
-        self.numbers_completed = []
-        self.waiting_for_gesture = False
-        self.hand_detected = False
-        self.game_start_time = None
-
-        # Emit restart event
-        self.socketio.emit('game_restarted', {})
-
-    def run(self, debug=False):
+        if self.inference_workers:
+            # Shared memory sized for the largest frame the pipeline sends (ROI crops fit it too)
+            return RemoteHands(max_frame_size=self.max_inference_size, **hands_kwargs)
+        return self.mp_hands.Hands(**hands_kwargs)
+
+    def count_fingers(self, landmarks, handedness=None, aspect=1.0):
+        """Count extended fingers, accepts landmarks or a (21, 3) array"""
+        if self.finger_classifier == 'legacy':
+            return finger_counter.count_fingers(landmarks)
+        return finger_counter.count_fingers_invariant(landmarks, handedness, aspect)
+
+    def run(self, debug=False, log_level=logging.INFO, log_json=False):
         """Start the Flask-SocketIO server"""
-        print(f"🚀 Starting Toddler Counting Game server on port {self.port}")
-        print(f"🌐 Access the game at: http://localhost:{self.port}")
+        setup_logging(log_level, json_lines=log_json)
+        logger.info("🚀 Starting Toddler Counting Game server on port %d", self.port)
+        logger.info("🌐 Access the game at: http://localhost:%d", self.port)
+
+        self.events.start()
+        self.scheduler.start()
+
+        # /dev/video* can be polled cheaply on Linux; push the new list to every client on hotplug
+        if sys.platform.startswith('linux'):
+            self.camera_registry.start_watching(
+                on_change=lambda cameras: self.send_camera_list(),
+                in_use=self.in_use_cameras
+            )
 
         try:
             self.socketio.run(
@@ -591,9 +459,16 @@ class GameServer:
                 debug=debug
             )
         except KeyboardInterrupt:
-            print("\n🛑 Shutting down server...")
+            logger.info("🛑 Shutting down server...")
         finally:
-            self.stop_camera()
+            for session in list(self.sessions.values()):
+                session.stop_camera()
+                session.close_recorder()
+            self.camera_registry.stop_watching()
+            self.video_channel.stop()
+            self.scheduler.stop()
+            self.events.stop()
+            shutdown_logging()
 
 if __name__ == '__main__':
     server = GameServer(port=5000)
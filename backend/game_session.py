@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+
+import logging
+import threading
+import time
+import cv2
+
+from src.frame_grabber import FrameGrabber
+from src.frame_pipeline import FramePipeline
+from src.frame_scheduler import FrameScheduler
+from src.game_logging import FieldsAdapter, log_fields
+from src.finger_counter import landmarks_to_array
+from src.gesture_stabilizer import GestureStabilizer
+from src.hand_overlay import draw_hand_overlay
+from src.landmark_packet import decode_packet, encode_packet
+from src.landmark_recorder import LandmarkRecorder, recording_directory
+from src.mjpeg_broadcaster import MjpegBroadcaster
+from src.replay_source import ReplayCapture
+from src.stage_timer import record_stage
+
+class GameSession:
+    """One child's game: its camera pipeline, game flow state and Socket.IO room.
+
+    GameServer keeps one GameSession per session id; every event a session emits
+    goes only to its own room, and its timers are scheduled in its own group so a
+    restart never touches other stations.
+    """
+
+    def __init__(self, server, session_id):
+        self.server = server
+        self.session_id = session_id
+        self.log = FieldsAdapter(logging.getLogger(__name__), {'session': session_id})
+
+        # Gesture detection components
+        self.cap = None
+        self.hands = None
+        self.reacquire_hands = None  # full-frame detection graph when ROI tracking is on
+        self.camera_thread = None
+        self.grabber = None
+        self.pipeline = None
+        self.broadcaster = None
+        self.is_running = False
+        self.current_camera_index = None
+        self.input_mode = 'camera'  # 'camera' (server-side inference) or 'client' (landmark packets)
+
+        # Stage timing hooks shared by this session's grabber, pipeline and broadcaster
+        self.stage_hooks = list(server.stage_hooks)
+
+        # Frame counters of pipelines that already stopped, so /metrics counters survive camera restarts
+        self.retired_counters = {'frames_processed': 0, 'frames_dropped': 0, 'timestamp_mismatches': 0}
+
+        # Landmark recording, opened on the first observed frame when the server has a record_dir
+        self.recorder = None
+        self.recording_refused = False  # session id unusable as a directory name
+
+        # Debounces per-frame counts so flicker never reaches game logic
+        self.stabilizer = GestureStabilizer(window_ms=server.stabilizer_window_ms,
+                                            min_dwell_ms=server.stabilizer_dwell_ms)
+        # Socket.IO handles every landmark packet on its own thread, next to the detection loop;
+        # serializes stabilizer updates, the game transitions they trigger and recording
+        self.observation_lock = threading.Lock()
+
+        # Game state
+        self.last_detected_number = None
+        self.detection_confidence = 0.0
+
+        # Game flow state
+        self.game_phase = 'technical_setup'  # technical_setup, user_setup, counting_game, completed
+        self.current_number = 1
+        self.numbers_completed = []
+        self.waiting_for_gesture = False
+        self.gesture_timeout_timer = None
+        self.hand_detected = False
+        self.game_start_time = None
+
+    def emit(self, event, data=None):
+        """Emit an event to this session's room only"""
+        self.server.events.emit(event, data, to=self.session_id)
+
+    def call_later(self, delay, callback, *args):
+        """Schedule a game-flow callback in this session's timer group"""
+        return self.server.scheduler.call_later(delay, callback, *args, group=self.session_id)
+
+    def start_camera(self, camera_index):
+        """Initialize camera capture in the server's capture mode (largest available by default, as in the POC)"""
+        if self.cap is not None:
+            self.stop_camera()
+
+        self.input_mode = 'camera'
+
+        owner = self.server.camera_owner(camera_index)
+        if owner is not None and owner is not self:
+            self.log.warning("❌ Camera %s is already used by session %s", camera_index, owner.session_id)
+            return False
+
+        self.cap = cv2.VideoCapture(camera_index)
+        if not self.cap.isOpened():
+            return False
+
+        # Negotiated once per camera and policy, then applied directly from the registry cache
+        self.server.camera_registry.apply_capture_mode(
+            self.cap, camera_index, self.server.capture_resolution, self.server.max_inference_size)
+
+        self.create_hands()
+
+        self.current_camera_index = camera_index
+        return True
+
+    def create_hands(self):
+        """Initialize MediaPipe hands (in-process or in this session's worker processes).
+
+        With ROI tracking, hand crops and full-frame reacquisition get separate
+        graphs, so neither graph's tracking state sees the other's geometry.
+        """
+        self.hands = self.server.create_hands()
+        self.reacquire_hands = self.server.create_hands() if self.server.roi_tracking else None
+
+    def frame_counters(self):
+        """Lifetime frame counters of this session (processed, dropped by the grabber, timestamp mismatches)"""
+        counters = dict(self.retired_counters)
+        if self.pipeline:
+            counters['frames_processed'] += self.pipeline.frames_processed
+            counters['timestamp_mismatches'] += self.pipeline.timestamp_mismatches
+        if self.grabber:
+            counters['frames_dropped'] += self.grabber.dropped_frames
+        return counters
+
+    def start_replay(self, path, realtime=True, loop=False):
+        """Play a recorded video through the same pipeline a camera would use (benchmarks, regression runs)"""
+        if self.cap is not None:
+            self.stop_camera()
+
+        self.input_mode = 'camera'
+        self.cap = ReplayCapture(path, realtime=realtime, loop=loop)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+
+        self.log.info("🎞️ Replaying %s (%s)", path, 'real time' if realtime else 'max speed')
+        self.create_hands()
+        self.start_gesture_detection()
+        return True
+
+    def stop_camera(self):
+        """Stop camera capture and cleanup"""
+        self.is_running = False
+
+        if self.broadcaster:
+            self.broadcaster.stop()
+            self.broadcaster = None
+
+        if self.pipeline:
+            self.pipeline.stop()
+
+        if self.grabber:
+            self.grabber.stop()
+
+        self.retired_counters = self.frame_counters()
+        self.pipeline = None
+        self.grabber = None
+
+        if self.camera_thread and self.camera_thread.is_alive():
+            self.camera_thread.join()
+
+        # A stopped camera is a natural chunk boundary; write out the partial chunk
+        if self.recorder:
+            self.recorder.flush()
+
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+        if self.hands:
+            self.hands.close()
+            self.hands = None
+
+        if self.reacquire_hands:
+            self.reacquire_hands.close()
+            self.reacquire_hands = None
+
+        self.current_camera_index = None
+
+    def start_gesture_detection(self):
+        """Start the shared frame pipeline and the gesture loop consuming it"""
+        if self.camera_thread and self.camera_thread.is_alive():
+            return
+
+        self.is_running = True
+        self.grabber = FrameGrabber(self.cap, stage_hooks=self.stage_hooks)
+        self.grabber.start()
+
+        scheduler = FrameScheduler(self.server.target_fps, self.server.idle_fps, self.server.idle_after)
+        self.pipeline = FramePipeline(self.grabber, self.hands, self.server.count_fingers,
+                                      max_inference_size=self.server.max_inference_size,
+                                      stream_size=self.server.stream_size,
+                                      scheduler=scheduler, roi_tracking=self.server.roi_tracking,
+                                      stage_hooks=self.stage_hooks, reacquire_hands=self.reacquire_hands)
+        self.pipeline.start()
+
+        # 'server' draws the skeleton into the stream, 'client' ships landmarks for a canvas overlay
+        annotate = self.draw_hand_landmarks if self.server.overlay == 'server' else None
+        self.broadcaster = MjpegBroadcaster(self.pipeline, annotate=annotate,
+                                            encoder=self.server.stream_encoder,
+                                            target_bitrate=self.server.stream_bitrate,
+                                            stage_hooks=self.stage_hooks)
+        self.broadcaster.start()
+
+        self.camera_thread = threading.Thread(target=self._gesture_detection_loop)
+        self.camera_thread.daemon = True
+        self.camera_thread.start()
+
+    def _gesture_detection_loop(self):
+        """Main gesture detection loop, fed by the frame pipeline"""
+        self.log.info("🤖 Starting gesture detection loop")
+
+        with self.observation_lock:
+            self.stabilizer.reset()
+        last_seq = 0
+        hand_was_visible = False
+        while self.is_running and self.pipeline and self.pipeline.is_running:
+            result = self.pipeline.wait_for_result(last_seq)
+            if result is None:
+                continue
+            last_seq = result.seq
+
+            hand_visible = result.points is not None
+            if self.server.overlay == 'client' and (hand_visible or hand_was_visible):
+                self.emit_hand_landmarks(result)
+            hand_was_visible = hand_visible
+
+            observed = result.finger_count if result.landmarks is not None else None
+            with self.observation_lock:
+                start = time.perf_counter()
+                self.process_observation(observed, result.timestamp)
+                record_stage(self.stage_hooks, 'emit', start)
+
+                if self.server.record_dir:
+                    height, width = result.frame.shape[:2]
+                    start = time.perf_counter()
+                    self.record_frame(result.points, result.handedness, width / height, observed, result.timestamp)
+                    record_stage(self.stage_hooks, 'record', start)
+
+        self.log.info("🤖 Gesture detection loop ended")
+
+    def process_observation(self, finger_count, timestamp):
+        """Feed one frame's finger count (None = no hand) into the game.
+
+        Counts go through the gesture stabilizer; only debounced transitions
+        reach the game logic and the socket.
+        """
+        if not self.stabilizer.update(finger_count, timestamp):
+            return
+
+        finger_count = self.stabilizer.current
+        if finger_count is not None:
+            # Handle hand detection during user setup phase
+            if self.game_phase == 'user_setup' and not self.hand_detected:
+                self.log.info("👋 Hand detected during user setup, starting counting game", extra=log_fields('gesture'))
+                self.hand_detected = True
+                self.start_counting_game()
+
+            # Only emit if it's a valid counting number (1-5 for this game)
+            if 1 <= finger_count <= 5 and finger_count != self.last_detected_number:
+                self.log.info("🔢 Detected: %d fingers", finger_count,
+                              extra=log_fields('gesture', number=finger_count))
+                self.emit('gesture_detected', {
+                    'number': finger_count,
+                    'confidence': self.stabilizer.confidence,
+                    'timestamp': timestamp
+                })
+                self.last_detected_number = finger_count
+
+                # Check for correct gesture during counting game
+                if self.game_phase == 'counting_game' and self.waiting_for_gesture:
+                    self.handle_correct_gesture(finger_count)
+        else:
+            # No hand detected
+            if self.last_detected_number is not None:
+                self.log.info("👋 No hand detected", extra=log_fields('gesture'))
+                self.emit('gesture_lost', {
+                    'timestamp': timestamp
+                })
+                self.last_detected_number = None
+
+    # Client-side landmark input
+    def start_client_input(self):
+        """Take landmarks from the client instead of running a camera pipeline"""
+        self.stop_camera()
+        with self.observation_lock:
+            self.stabilizer.reset()
+        self.input_mode = 'client'
+
+    def process_landmark_packet(self, data):
+        """Count fingers for one client landmark packet and feed the result into the game"""
+        if self.input_mode != 'client':
+            return False
+
+        packet = decode_packet(data)
+        finger_count = None
+        if packet.points is not None:
+            start = time.perf_counter()
+            finger_count = self.server.count_fingers(packet.points, packet.handedness, packet.aspect)
+            record_stage(self.stage_hooks, 'counting', start)
+
+        with self.observation_lock:
+            # Client clocks can't be trusted for the stabilizer window, so use arrival time
+            timestamp = time.time()
+            start = time.perf_counter()
+            self.process_observation(finger_count, timestamp)
+            record_stage(self.stage_hooks, 'emit', start)
+
+            if self.server.record_dir:
+                start = time.perf_counter()
+                self.record_frame(packet.points, packet.handedness, packet.aspect, finger_count, timestamp)
+                record_stage(self.stage_hooks, 'record', start)
+        return True
+
+    # Landmark recording
+    def record_frame(self, points, handedness, aspect, finger_count, timestamp):
+        """Append one observed frame and the game state it was seen in to this session's recording"""
+        if self.recorder is None:
+            if self.recording_refused:
+                return
+            try:
+                directory = recording_directory(self.server.record_dir, self.session_id)
+            except (ValueError, OSError) as e:
+                self.log.error("❌ Not recording landmarks: %s", e)
+                self.recording_refused = True
+                return
+
+            self.recorder = LandmarkRecorder(
+                directory,
+                chunk_frames=self.server.record_chunk_frames,
+                max_bytes=self.server.record_max_bytes,
+                metadata={'session_id': self.session_id,
+                          'finger_classifier': self.server.finger_classifier,
+                          'stabilizer_window_ms': self.server.stabilizer_window_ms,
+                          'stabilizer_dwell_ms': self.server.stabilizer_dwell_ms}
+            )
+            self.log.info("💾 Recording landmarks to %s", self.recorder.directory)
+
+        counting = self.game_phase == 'counting_game'
+        self.recorder.record(points, handedness, aspect, finger_count, self.stabilizer.current, self.game_phase,
+                             self.current_number if counting else 0, counting and self.waiting_for_gesture,
+                             timestamp)
+
+    def close(self):
+        """Release everything the session holds once the server drops it"""
+        self.stop_camera()
+        self.server.scheduler.cancel_all(group=self.session_id)
+        self.gesture_timeout_timer = None
+        self.close_recorder()
+        # A later session reusing this id must not inherit the room's gesture dedup state
+        self.server.events.forget(self.session_id)
+
+    def close_recorder(self):
+        """Write out everything recorded so far and stop the recording's writer thread"""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def emit_hand_landmarks(self, result):
+        """Ship a frame's landmarks as a binary packet for the client to draw (sent once more when the hand leaves)"""
+        # The overlay is drawn over the video, so without a viewer (MJPEG or binary channel) it's wasted bandwidth
+        broadcaster = self.broadcaster
+        if broadcaster is None or not broadcaster.viewer_count:
+            return
+        height, width = result.frame.shape[:2]
+        self.emit('hand_landmarks', {
+            'seq': result.seq,
+            'timestamp': result.timestamp,
+            'packet': encode_packet(result.points, result.handedness, width / height)
+        })
+
+    def draw_hand_landmarks(self, frame, hand_landmarks):
+        """Draw landmark points and connections onto frame in place (from POC), from landmarks or a (21, 3) array"""
+        draw_hand_overlay(frame, landmarks_to_array(hand_landmarks))
+
+    def generate_video_frames(self, full_resolution=False, target_bitrate=None):
+        """Stream annotated frames to one viewer via the shared MJPEG broadcaster.
+
+        Gesture events are emitted by the gesture loop only; viewers just render.
+        """
+        if self.broadcaster is None:
+            return
+        yield from self.broadcaster.stream(full_resolution, target_bitrate)
+
+    # Game Flow Management Methods
+    def start_user_setup_phase(self):
+        """Start user setup phase after camera is running"""
+        self.log.info("🎮 Starting user setup phase")
+        self.game_phase = 'user_setup'
+        self.hand_detected = False
+
+        # Emit phase change to frontend
+        self.emit('game_phase_changed', {
+            'phase': 'user_setup',
+            'message': 'Playing greeting audio'
+        })
+
+        # Start the user setup sequence - just play the greeting first
+        self.emit('play_audio', {'file': 'hi_ready_to_play'})
+
+    def handle_audio_completed(self, audio_file):
+        """Handle when audio playback is completed"""
+        self.log.info("🔊 Audio completed: %s", audio_file)
+
+        if self.game_phase == 'user_setup':
+            if 'hi_ready_to_play' in audio_file:
+                # Wait 2 seconds then play next instruction
+                self.call_later(2.0, self.play_show_fingers)
+            elif 'show_me_your_fingers' in audio_file:
+                # Start monitoring for hand detection
+                self.start_hand_monitoring()
+
+        elif self.game_phase == 'counting_game':
+            if any(num in audio_file for num in ['one', 'two', 'three', 'four', 'five']):
+                # Number audio finished, start 15-second timer
+                self.start_gesture_timeout()
+
+    def play_show_fingers(self):
+        """Play the show fingers instruction"""
+        self.emit('play_audio', {'file': 'show_me_your_fingers'})
+
+    def start_hand_monitoring(self):
+        """Start monitoring for hand detection during user setup"""
+        self.log.info("👋 Monitoring for hand detection...")
+        self.wake_frame_scheduler()
+        # The hand detection will be handled by the existing gesture detection loop
+        # When a hand is detected, it will trigger the transition
+
+    def start_counting_game(self):
+        """Start the counting game after hand is detected"""
+        if self.game_phase != 'user_setup':
+            return
+
+        self.log.info("🎮 Starting counting game")
+        self.game_phase = 'counting_game'
+        self.current_number = 1
+        self.numbers_completed = []
+
+        # Play "let's start counting" then start with number 1
+        self.emit('game_phase_changed', {
+            'phase': 'counting_game',
+            'current_number': self.current_number
+        })
+
+        self.emit('play_audio', {'file': 'lets_start_counting'})
+
+        # After audio finishes, wait a bit longer then start with number 1
+        self.call_later(5.0, self.start_current_number)
+
+    def start_current_number(self):
+        """Start the current number challenge"""
+        self.log.info("🔢 Starting number %d", self.current_number)
+
+        self.waiting_for_gesture = True
+        self.wake_frame_scheduler()
+
+        # Emit number started event
+        self.emit('number_started', {
+            'number': self.current_number,
+            'timeout': 15000  # 15 seconds
+        })
+
+        # Play the number audio immediately
+        self.emit('play_audio', {'file': f'number_{self.current_number}'})
+
+    def wake_frame_scheduler(self):
+        """Return inference to full rate when the game starts expecting a hand"""
+        if self.pipeline:
+            self.pipeline.scheduler.reset()
+
+    def start_gesture_timeout(self):
+        """Start 15-second timeout for gesture detection"""
+        self.log.info("⏰ Starting 15-second timeout for number %d", self.current_number)
+
+        # Cancel any existing timer
+        if self.gesture_timeout_timer:
+            self.gesture_timeout_timer.cancel()
+
+        # Start new timer
+        self.gesture_timeout_timer = self.call_later(15.0, self.handle_gesture_timeout)
+
+    def handle_gesture_timeout(self):
+        """Handle when gesture timeout expires"""
+        if not self.waiting_for_gesture:
+            return  # Gesture was already detected
+
+        self.log.info("⏰ Timeout for number %d, replaying audio", self.current_number)
+
+        # Replay the number audio
+        self.emit('play_audio', {'file': f'number_{self.current_number}'})
+
+        # Don't cancel waiting_for_gesture - keep waiting
+        # The timeout will be restarted when audio finishes
+
+    def handle_correct_gesture(self, detected_number):
+        """Handle when correct gesture is detected"""
+        if not self.waiting_for_gesture or detected_number != self.current_number:
+            return
+
+        self.log.info("✅ Correct gesture detected: %d", detected_number)
+
+        # Cancel timeout timer
+        if self.gesture_timeout_timer:
+            self.gesture_timeout_timer.cancel()
+            self.gesture_timeout_timer = None
+
+        self.waiting_for_gesture = False
+
+        # Add to completed numbers
+        self.numbers_completed.append(self.current_number)
+
+        # Emit success event
+        self.emit('number_success', {
+            'number': self.current_number,
+            'completed': self.numbers_completed
+        })
+
+        # Play random positive feedback
+        self.emit('play_random_positive_feedback', {})
+
+        # Move to next number after a longer delay to let positive feedback finish
+        if self.current_number < 5:
+            self.call_later(4.0, self.move_to_next_number)
+        else:
+            self.call_later(4.0, self.complete_game)
+
+    def move_to_next_number(self):
+        """Move to the next number in sequence"""
+        self.current_number += 1
+        self.log.info("➡️ Moving to number %d", self.current_number)
+
+        self.emit('next_number', {
+            'number': self.current_number,
+            'progress': len(self.numbers_completed)
+        })
+
+        # Start the new number
+        self.start_current_number()
+
+    def complete_game(self):
+        """Complete the game when all numbers are done"""
+        self.log.info("🎉 Game completed!")
+        self.game_phase = 'completed'
+
+        self.emit('game_completed', {
+            'numbers_completed': self.numbers_completed,
+            'completion_time': time.time() - self.game_start_time if self.game_start_time else 0
+        })
+
+    def restart_game(self):
+        """Restart the game from the beginning"""
+        self.log.info("🔄 Restarting game")
+
+        # Cancel every pending transition of this session, including the gesture timeout
+        self.server.scheduler.cancel_all(group=self.session_id)
+        self.gesture_timeout_timer = None
+
+        # Reset game state
+        self.game_phase = 'technical_setup'
+        self.current_number = 1
+        self.numbers_completed = []
+        self.waiting_for_gesture = False
+        self.hand_detected = False
+        self.game_start_time = None
+
+        # Emit restart event
+        self.emit('game_restarted', {})
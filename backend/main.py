@@ -4,29 +4,16 @@ import cv2
 import mediapipe as mp
 import numpy as np
 
+from src import finger_counter
+from src.camera_registry import CameraRegistry
+from src.game_logging import setup_logging, shutdown_logging
+
 def count_fingers(landmarks):
     """Simple finger counting"""
-    finger_tips = [4, 8, 12, 16, 20]
-    finger_pips = [3, 6, 10, 14, 18]
-
-    fingers = []
-
-    # Thumb
-    if landmarks[4].x > landmarks[3].x:
-        fingers.append(1)
-    else:
-        fingers.append(0)
-
-    # Other fingers
-    for i in range(1, 5):
-        if landmarks[finger_tips[i]].y < landmarks[finger_pips[i]].y:
-            fingers.append(1)
-        else:
-            fingers.append(0)
-
-    return sum(fingers)
+    return finger_counter.count_fingers(landmarks)
 
 def main():
+    setup_logging()
     print("🎥 Basic Hand Gesture Recognition")
     print("=" * 40)
 
@@ -54,30 +41,8 @@ def main():
         print(f"❌ Cannot open camera {camera_index}")
         return
 
-    # Try to set Full HD resolution first
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-
-    # Check what resolution we actually got
-    actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    print(f"📺 Camera resolution: {actual_width}x{actual_height}")
-
-    # If we didn't get Full HD, try 720p
-    if actual_width < 1920 or actual_height < 1080:
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        print(f"📺 Fallback to: {actual_width}x{actual_height}")
-
-    # Last resort: VGA
-    if actual_width < 1280 or actual_height < 720:
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        print(f"📺 Using VGA: {actual_width}x{actual_height}")
+    # Largest available mode, negotiated once per camera and remembered afterwards
+    CameraRegistry().apply_capture_mode(cap, camera_index)
 
     print("🚀 System started!")
     print("📋 Controls:")
@@ -210,6 +175,7 @@ def main():
     cv2.destroyAllWindows()
     hands.close()
     print("✅ Done!")
+    shutdown_logging()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import time
+
+# JPEG quality steps, best first; viewers sharing a step share one encode
+QUALITY_LEVELS = (85, 70, 55, 40)
+
+
+class BitrateController:
+    """Per-viewer JPEG quality and frame skipping toward a target bandwidth.
+
+    Two signals drive it: the bandwidth the stream would need at the current
+    quality (average frame size x offered frame rate), and the throughput the
+    viewer's connection actually delivered, measured from how long each write
+    blocked. The budget is the lower of the target and that measured link rate.
+    Quality steps down while demand exceeds the budget and back up once demand
+    falls well below it, at most once per adapt_interval. A token bucket drops
+    frames at every quality, so the stream never sends faster than the budget
+    while quality catches up; at the lowest quality it is the only lever left.
+    """
+
+    def __init__(self, target_bps, quality_levels=QUALITY_LEVELS, headroom=0.6, adapt_interval=1.0,
+                 smoothing=0.2):
+        self.target_bps = target_bps
+        self.quality_levels = quality_levels
+        self.headroom = headroom
+        self.adapt_interval = adapt_interval
+        self.smoothing = smoothing
+
+        self.level = 0
+        self.link_bps = None  # measured delivery rate (smoothed), None until a write blocked
+        self.frame_bytes = None  # average chunk size at the current quality
+        self.frame_interval = None  # average time between frames offered to this viewer
+
+        self._tokens = 0.0
+        self._last_offer = None
+        self._last_adapt = time.time()
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    @property
+    def quality(self):
+        return self.quality_levels[self.level]
+
+    @property
+    def budget_bps(self):
+        if self.link_bps is None:
+            return self.target_bps
+        return min(self.target_bps, 0.9 * self.link_bps)
+
+    def _smooth(self, current, value):
+        return value if current is None else current + self.smoothing * (value - current)
+
+    def should_send(self, size, now=None):
+        """Offer one encoded frame of size bytes; False means skip it to stay within budget"""
+        now = time.time() if now is None else now
+        budget_bytes = self.budget_bps / 8
+
+        if self._last_offer is None:
+            self._tokens = size
+        else:
+            elapsed = now - self._last_offer
+            self.frame_interval = self._smooth(self.frame_interval, elapsed)
+            # Allow up to half a second of burst
+            self._tokens = min(self._tokens + budget_bytes * elapsed, max(budget_bytes * 0.5, size))
+        self._last_offer = now
+
+        if self._tokens < size:
+            self.frames_skipped += 1
+            return False
+        self._tokens -= size
+        return True
+
+    def on_sent(self, size, write_seconds, now=None):
+        """Record a frame written to the viewer and how long the write blocked"""
+        now = time.time() if now is None else now
+        self.frames_sent += 1
+        self.frame_bytes = self._smooth(self.frame_bytes, size)
+
+        # Short writes only filled the socket buffer and say nothing about the link
+        if write_seconds > 0.002:
+            self.link_bps = self._smooth(self.link_bps, size * 8 / write_seconds)
+        elif self.link_bps is not None:
+            # Writes stopped blocking - let the link estimate recover until it no longer limits
+            self.link_bps *= 1.05
+            if self.link_bps > 2 * self.target_bps:
+                self.link_bps = None
+
+        if now - self._last_adapt >= self.adapt_interval:
+            self._last_adapt = now
+            self._adapt()
+
+    def _adapt(self):
+        if self.frame_bytes is None or not self.frame_interval:
+            return
+
+        demand_bps = self.frame_bytes * 8 / self.frame_interval
+        budget = self.budget_bps
+        if demand_bps > budget and self.level < len(self.quality_levels) - 1:
+            self.level += 1
+        elif demand_bps < self.headroom * budget and self.level > 0:
+            self.level -= 1
+        else:
+            return
+        # Frame sizes at the new quality are measured afresh
+        self.frame_bytes = None
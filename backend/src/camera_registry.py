@@ -0,0 +1,350 @@
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import cv2
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'carmels-game', 'cameras.json')
+
+# Resolutions probed on a new device, largest first
+PROBE_RESOLUTIONS = [(1920, 1080), (1280, 720), (640, 480)]
+
+# A device that failed its probe (busy, unplugged mid-probe) is probed again after this many seconds
+UNUSABLE_RETRY_SECONDS = 30.0
+
+
+def device_key(index):
+    """Cache key for a camera index: its /dev/video node on Linux, otherwise index:N"""
+    if sys.platform.startswith('linux'):
+        return f"/dev/video{index}"
+    return f"index:{index}"
+
+
+def device_signature(key):
+    """(inode, ctime) of a device node - changes when the device is replugged; None if unavailable"""
+    if not key.startswith('/dev/'):
+        return None
+    try:
+        stat = os.stat(key)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_ctime]
+
+
+def list_devices(max_index=6):
+    """Map device key -> (camera index, change signature) for every camera device present.
+
+    On Linux devices are the /dev/video* nodes, keyed by path. Elsewhere indices
+    can't be enumerated without opening them, so 0..max_index-1 are keyed by
+    index with no signature.
+    """
+    if sys.platform.startswith('linux'):
+        devices = {}
+        for path in glob.glob('/dev/video*'):
+            match = re.match(r'/dev/video(\d+)$', path)
+            if not match:
+                continue
+            signature = device_signature(path)
+            if signature is not None:
+                devices[path] = (int(match.group(1)), signature)
+        return devices
+
+    return {device_key(index): (index, None) for index in range(max_index)}
+
+
+def resolution_ladder(policy='max', inference_size=(1280, 720)):
+    """Capture resolutions to try, in order, for a capture policy.
+
+    'max' is the original largest-first 1080p -> 720p -> VGA ladder. 'inference'
+    prefers the smallest mode that still covers the inference size, since
+    anything larger is downscaled before MediaPipe anyway. A (width, height)
+    tuple asks for that exact mode first.
+    """
+    if policy == 'max':
+        return list(PROBE_RESOLUTIONS)
+
+    if policy == 'inference':
+        width, height = inference_size
+        covering = [size for size in PROBE_RESOLUTIONS if size[0] >= width and size[1] >= height]
+        smaller = [size for size in PROBE_RESOLUTIONS if size not in covering]
+        return sorted(covering, key=lambda size: size[0] * size[1]) + smaller
+
+    requested = tuple(policy)
+    return [requested] + [size for size in PROBE_RESOLUTIONS if size != requested]
+
+
+def _policy_key(policy, inference_size):
+    if policy == 'max':
+        return 'max'
+    if policy == 'inference':
+        return f"inference:{inference_size[0]}x{inference_size[1]}"
+    return f"{policy[0]}x{policy[1]}"
+
+
+def read_resolution(cap):
+    return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+
+def set_resolution(cap, width, height):
+    """Set a capture mode unless the device already reports it; returns the mode actually in effect"""
+    if read_resolution(cap) != (width, height):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    return read_resolution(cap)
+
+
+def negotiate_resolution(cap, ladder):
+    """Walk the ladder until the device accepts a mode at least as large as requested"""
+    actual = read_resolution(cap)
+    for width, height in ladder:
+        actual = set_resolution(cap, width, height)
+        logger.info("📺 Camera resolution: %dx%d", *actual)
+        if actual[0] >= width and actual[1] >= height:
+            break
+    return actual
+
+
+def probe_device(index, backend=cv2.CAP_ANY):
+    """Open a camera, read one frame and record the probed resolutions it accepts; None if unusable"""
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if not cap.isOpened():
+            return None
+        ret, _ = cap.read()
+        if not ret:
+            return None
+
+        resolutions = []
+        for width, height in PROBE_RESOLUTIONS:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            actual = [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+            if actual not in resolutions:
+                resolutions.append(actual)
+
+        return {
+            'index': index,
+            'backend': backend,
+            'resolutions': sorted(resolutions, key=lambda size: size[0] * size[1], reverse=True),
+        }
+    finally:
+        cap.release()
+
+
+class CameraRegistry:
+    """Parallel, cached camera discovery shared by the server, the camera selector and VideoCapture.
+
+    Devices are probed concurrently with a per-device timeout, and the results
+    (index, backend, supported resolutions) are cached on disk keyed by device,
+    so later lookups only probe devices that appeared or were replugged. A
+    background watcher can poll for hotplug and refresh incrementally.
+
+    Failed probes are only remembered for unusable_retry seconds, since a camera
+    may just have been busy at the time.
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, max_index=6, probe_timeout=3.0,
+                 unusable_retry=UNUSABLE_RETRY_SECONDS):
+        self.cache_path = cache_path
+        self.max_index = max_index
+        self.probe_timeout = probe_timeout
+        self.unusable_retry = unusable_retry
+
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()  # one refresh (probe + cache write) at a time
+        self._probing = set()  # device keys whose probe thread is still running (possibly hung)
+        cache = self._load_cache()
+        self.devices = cache.get('devices', {})  # device key -> entry ({'unusable': True, 'probed': t} = failed probe)
+        self.modes = cache.get('modes', {})  # device key -> {'signature': ..., 'policies': {policy: [w, h]}}
+        self.watch_thread = None
+        self.is_watching = False
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'devices': self.devices, 'modes': self.modes, 'updated': time.time()}, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning("Could not write camera cache %s: %s", self.cache_path, e)
+
+    def _probe_all(self, pending):
+        """Probe {key: (index, signature)} in parallel; returns {key: entry or None}.
+
+        Devices that time out or raise are left out, so they are retried on the next refresh.
+        """
+        results = {}
+        if not pending:
+            return results
+
+        futures = {key: self._start_probe(key, index) for key, (index, _) in pending.items()}
+        deadline = time.monotonic() + self.probe_timeout
+        for key, future in futures.items():
+            try:
+                results[key] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                logger.warning("Camera probe timed out for %s", key)
+            except Exception as e:
+                logger.warning("Camera probe failed for %s: %s", key, e)
+        return results
+
+    def _start_probe(self, key, index):
+        """Probe on a daemon thread, so one stuck on a missing device never blocks interpreter exit"""
+        future = Future()
+
+        def probe():
+            try:
+                future.set_result(self._probe_with_fallback(index))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.lock:
+                    self._probing.discard(key)
+
+        with self.lock:
+            self._probing.add(key)
+        threading.Thread(target=probe, daemon=True).start()
+        return future
+
+    def _needs_probe(self, key, signature, force, now):
+        """Whether a present device has to be probed (called with the lock held)"""
+        if key in self._probing:
+            return False  # a timed-out probe is still running; don't pile another thread on it
+        cached = self.devices.get(key)
+        if force or not cached:
+            return True
+        if cached.get('unusable'):
+            return now - cached.get('probed', 0) >= self.unusable_retry
+        return signature is not None and cached.get('signature') != signature
+
+    @staticmethod
+    def _probe_with_fallback(index):
+        entry = probe_device(index)
+        if entry is None and sys.platform == 'win32':
+            entry = probe_device(index, cv2.CAP_DSHOW)
+        return entry
+
+    def refresh(self, force=False, in_use=()):
+        """Bring the registry up to date, probing only new or changed devices; returns True if anything changed.
+
+        Indices in in_use are held open by a running session, so they keep their
+        cached entry instead of being probed (and misreported as unusable).
+        force re-probes every other present device. Concurrent callers (the
+        watcher, camera tests) wait for the running refresh instead of probing
+        the same devices twice.
+        """
+        with self.refresh_lock:
+            present = list_devices(self.max_index)
+            now = time.time()
+
+            with self.lock:
+                pending = {key: (index, signature) for key, (index, signature) in present.items()
+                           if index not in in_use and self._needs_probe(key, signature, force, now)}
+                removed = [key for key in self.devices if key not in present]
+
+            if not pending and not removed:
+                return False
+
+            probed = self._probe_all(pending)
+
+            with self.lock:
+                for key in removed:
+                    del self.devices[key]
+                for key, entry in probed.items():
+                    index, signature = pending[key]
+                    if entry is None:
+                        # Remembered briefly so a busy or broken device isn't probed on every call
+                        entry = {'index': index, 'signature': signature, 'unusable': True, 'probed': now}
+                    else:
+                        entry['signature'] = signature
+                        entry['name'] = f"Camera {index}"
+                    self.devices[key] = entry
+                self._save_cache()
+            return True
+
+    def get_cameras(self, refresh=True, in_use=(), force=False):
+        """Usable cameras sorted by index, as dicts with index, backend, name and resolutions"""
+        if refresh:
+            self.refresh(force=force, in_use=in_use)
+        with self.lock:
+            cameras = [dict(entry) for entry in self.devices.values() if entry and not entry.get('unusable')]
+        return sorted(cameras, key=lambda camera: camera['index'])
+
+    def get_camera(self, index):
+        for camera in self.get_cameras(refresh=False):
+            if camera['index'] == index:
+                return camera
+        return None
+
+    def apply_capture_mode(self, cap, index, policy='max', inference_size=(1280, 720)):
+        """Put an open capture into its capture mode for a policy, negotiating only the first time.
+
+        The negotiated (width, height) is remembered per device and policy, in
+        memory and in the cache file, so later starts set it directly instead of
+        walking the resolution ladder. A replugged device renegotiates.
+        """
+        key = device_key(index)
+        signature = device_signature(key)
+        policy_key = _policy_key(policy, inference_size)
+
+        with self.lock:
+            remembered = self.modes.get(key)
+            if remembered is not None and remembered.get('signature') != signature:
+                remembered = None
+            mode = (remembered or {}).get('policies', {}).get(policy_key)
+
+        if mode is not None:
+            actual = set_resolution(cap, *mode)
+            if list(actual) == list(mode):
+                logger.info("📺 Camera resolution (cached): %dx%d", *actual)
+                return actual
+            logger.info("📺 Cached mode %dx%d rejected, renegotiating", *mode)
+
+        actual = negotiate_resolution(cap, resolution_ladder(policy, inference_size))
+
+        with self.lock:
+            entry = self.modes.get(key)
+            if entry is None or entry.get('signature') != signature:
+                entry = self.modes[key] = {'signature': signature, 'policies': {}}
+            entry['policies'][policy_key] = list(actual)
+            self._save_cache()
+        return actual
+
+    def start_watching(self, on_change=None, interval=2.0, in_use=None):
+        """Poll for hotplugged devices in the background and call on_change(cameras) when they change.
+
+        in_use, if given, is called before each poll for the camera indices currently held open.
+        """
+        if self.watch_thread and self.watch_thread.is_alive():
+            return
+
+        def watch():
+            while self.is_watching:
+                time.sleep(interval)
+                busy = in_use() if in_use else ()
+                if self.refresh(in_use=busy) and on_change:
+                    on_change(self.get_cameras(refresh=False))
+
+        self.is_watching = True
+        self.watch_thread = threading.Thread(target=watch)
+        self.watch_thread.daemon = True
+        self.watch_thread.start()
+
+    def stop_watching(self):
+        self.is_watching = False
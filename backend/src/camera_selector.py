@@ -4,6 +4,8 @@ import cv2
 import threading
 import time
 
+from .camera_registry import CameraRegistry
+
 class CameraSelector:
     def __init__(self):
         self.root = tk.Tk()
@@ -11,6 +13,7 @@ class CameraSelector:
         self.root.geometry("600x500")
         self.root.resizable(False, False)
 
+        self.registry = CameraRegistry()
         self.available_cameras = []
         self.selected_camera = None
         self.selected_camera_resolution = None
@@ -93,86 +96,25 @@ class CameraSelector:
         thread.daemon = True
         thread.start()
 
-    def _test_camera_resolutions(self, camera_index, backend=cv2.CAP_ANY):
-        """Test camera with safe, compatible resolution"""
-        # Force VGA resolution for maximum compatibility
-        cap = cv2.VideoCapture(camera_index, backend)
-        if not cap.isOpened():
-            return None
-
-        # Set VGA resolution - most compatible
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
-        # Test if we can actually read a frame
-        ret, frame = cap.read()
-        if ret and frame is not None and frame.size > 0:
-            actual_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            actual_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            cap.release()
-            return (actual_width, actual_height)
-
-        cap.release()
-        return None
-
     def _detect_cameras(self):
         working_cameras = []
 
-        # Test camera indices 0-5 (reduced range for speed)
-        for i in range(6):
-            try:
-                # First test if camera exists with basic check
-                cap = cv2.VideoCapture(i)
-                if cap.isOpened():
-                    ret, frame = cap.read()
-                    if ret:
-                        cap.release()
-
-                        # Now test for best resolution
-                        best_res = self._test_camera_resolutions(i)
-                        if best_res:
-                            width, height = best_res
-                            resolution_text = f"{width}x{height} (Compatible)"
-
-                            working_cameras.append({
-                                'index': i,
-                                'name': f"Camera {i}",
-                                'resolution': resolution_text,
-                                'best_resolution': best_res,
-                                'status': "Working"
-                            })
-                    else:
-                        cap.release()
-            except:
-                pass
-
-        # If no cameras found with default backend, try DirectShow
-        if not working_cameras:
-            for i in range(5):
-                try:
-                    cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-                    if cap.isOpened():
-                        ret, frame = cap.read()
-                        if ret:
-                            cap.release()
-
-                            # Test for best resolution with DirectShow
-                            best_res = self._test_camera_resolutions(i, cv2.CAP_DSHOW)
-                            if best_res:
-                                width, height = best_res
-                                resolution_text = f"{width}x{height} (Compatible)"
-
-                                working_cameras.append({
-                                    'index': i,
-                                    'name': f"Camera {i} (DirectShow)",
-                                    'resolution': resolution_text,
-                                    'best_resolution': best_res,
-                                    'status': "Working"
-                                })
-                        else:
-                            cap.release()
-                except:
-                    pass
+        for camera in self.registry.get_cameras():
+            # Prefer VGA when the camera supports it - most compatible
+            resolutions = [tuple(size) for size in camera['resolutions']]
+            best_res = (640, 480) if (640, 480) in resolutions else resolutions[-1]
+            width, height = best_res
+            name = camera['name']
+            if camera['backend'] == cv2.CAP_DSHOW:
+                name += " (DirectShow)"
+
+            working_cameras.append({
+                'index': camera['index'],
+                'name': name,
+                'resolution': f"{width}x{height} (Compatible)",
+                'best_resolution': best_res,
+                'status': "Working"
+            })
 
         # Update UI in main thread
         self.root.after(0, self._update_camera_list, working_cameras)
@@ -1,6 +1,10 @@
+import logging
+
 import cv2
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 class DisplayManager:
     def __init__(self, window_name="Hand Gesture Recognition", show_landmarks=False):
         self.window_name = window_name
@@ -13,6 +17,7 @@ class DisplayManager:
         cv2.namedWindow(self.window_name, cv2.WINDOW_AUTOSIZE)
 
     def render_frame(self, frame, detected_number=None, hand_landmarks=None, gesture_detector=None):
+        """Draw the overlays onto frame in place and show it; pass a copy if the clean frame is still needed"""
         if frame is None or frame.size == 0:
             return
 
@@ -21,7 +26,8 @@ class DisplayManager:
             if not frame.flags['C_CONTIGUOUS']:
                 frame = frame.copy()
 
-            display_frame = frame.copy()
+            # VideoCapture.read_frame hands out a fresh mirrored frame, so draw on it directly
+            display_frame = frame
 
             if self.show_landmarks and hand_landmarks and gesture_detector:
                 display_frame = gesture_detector.draw_landmarks(display_frame, hand_landmarks)
@@ -31,7 +37,7 @@ class DisplayManager:
             cv2.imshow(self.window_name, display_frame)
 
         except Exception as e:
-            print(f"Display error: {e}")
+            logger.error("Display error: %s", e)
             # Try to show a basic frame without overlays
             try:
                 cv2.imshow(self.window_name, frame)
@@ -78,7 +84,7 @@ class DisplayManager:
             return True
         elif key == ord('l'):
             self.show_landmarks = not self.show_landmarks
-            print(f"Landmarks display: {'ON' if self.show_landmarks else 'OFF'}")
+            logger.info("Landmarks display: %s", 'ON' if self.show_landmarks else 'OFF')
         return False
 
     def cleanup(self):
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable
+
+
+class EventBus:
+    """Outbound Socket.IO event bus that coalesces high-frequency events.
+
+    Events named in coalesced_events (gesture updates) are held for up to
+    window seconds: within a window only the latest payload per event type and
+    recipient is kept, payloads identical to the last one sent are dropped, and
+    whatever is left goes out as one 'event_batch' message per tick. All other
+    events (play_audio, phase changes, ...) are emitted immediately so they
+    never wait behind gesture traffic.
+    """
+
+    def __init__(self, emit_func: Callable, window=0.1,
+                 coalesced_events=('gesture_detected', 'gesture_lost')):
+        self.emit_func = emit_func
+        self.window = window
+        self.coalesced_events = set(coalesced_events)
+
+        self.is_running = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._pending = {}  # (to, event) -> (order, data)
+        self._last_sent = {}  # to -> (event, payload without timestamp)
+        self._order = 0
+        self.emit_counts = Counter()  # event name -> emit() calls, for /metrics
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.thread = None
+        self.flush()
+
+    def emit(self, event, data=None, to=None):
+        """Emit now, or queue for the next batch if event is a coalesced type"""
+        self.emit_counts[event] += 1
+        if event not in self.coalesced_events or not self.is_running:
+            self._send(event, data, to)
+            return
+
+        with self._lock:
+            self._order += 1
+            self._pending[(to, event)] = (self._order, data)
+
+    def forget(self, to):
+        """Drop pending events and dedup state for a recipient (e.g. a closed session's room)"""
+        with self._lock:
+            self._last_sent.pop(to, None)
+            for key in [key for key in self._pending if key[0] == to]:
+                del self._pending[key]
+
+    def _send(self, event, data, to):
+        if to is None:
+            self.emit_func(event, data)
+        else:
+            self.emit_func(event, data, to=to)
+
+    @staticmethod
+    def _dedup_key(event, data):
+        payload = {key: value for key, value in (data or {}).items() if key != 'timestamp'}
+        return event, sorted(payload.items())
+
+    def flush(self):
+        """Send everything pending as one batch per recipient"""
+        batches = {}
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+
+            # Under the lock so forget() can't race a flush into restoring a recipient's state
+            for (to, event), (order, data) in sorted(pending.items(), key=lambda item: item[1][0]):
+                key = self._dedup_key(event, data)
+                if self._last_sent.get(to) == key:
+                    continue
+                self._last_sent[to] = key
+                batches.setdefault(to, []).append({'event': event, 'data': data})
+
+        for to, events in batches.items():
+            self._send('event_batch', {'events': events, 'timestamp': time.time()}, to)
+
+    def _run(self):
+        while self.is_running:
+            time.sleep(self.window)
+            self.flush()
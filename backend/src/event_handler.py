@@ -1,6 +1,8 @@
 import logging
 from typing import Callable, List, Optional
 
+logger = logging.getLogger(__name__)
+
 class EventHandler:
     def __init__(self):
         self.handlers: List[Callable[[int], None]] = []
@@ -11,12 +13,12 @@ class EventHandler:
     def register_handler(self, handler: Callable[[int], None]):
         if handler not in self.handlers:
             self.handlers.append(handler)
-            logging.info(f"Handler registered: {handler.__name__}")
+            logger.info("Handler registered: %s", handler.__name__)
 
     def unregister_handler(self, handler: Callable[[int], None]):
         if handler in self.handlers:
             self.handlers.remove(handler)
-            logging.info(f"Handler unregistered: {handler.__name__}")
+            logger.info("Handler unregistered: %s", handler.__name__)
 
     def process_gesture(self, detected_number: Optional[int]):
         if detected_number == self.current_gesture:
@@ -35,8 +37,8 @@ class EventHandler:
             try:
                 handler(number)
             except Exception as e:
-                logging.error(f"Error in handler {handler.__name__}: {e}")
+                logger.error("Error in handler %s: %s", handler.__name__, e)
 
     def clear_handlers(self):
         self.handlers.clear()
-        logging.info("All handlers cleared")
\ No newline at end of file
+        logger.info("All handlers cleared")
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""Vectorized finger counting shared by the server, the CLI demo and GestureDetector.
+
+Landmarks are converted once into a (21, 3) float32 array of normalized x, y, z
+MediaPipe coordinates. Every function also accepts a batch of shape (N, 21, 3)
+so recorded datasets can be evaluated offline with the same code path.
+
+Two classifiers are available: the POC tip-vs-joint heuristics (extended_fingers)
+and the handedness- and rotation-invariant joint-angle classifier
+(extended_fingers_invariant) used by the live server.
+"""
+
+from itertools import chain
+from typing import Optional
+
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_PIPS = np.array([3, 6, 10, 14, 18])
+
+WRIST = 0
+THUMB_MCP, THUMB_IP, THUMB_TIP = 2, 3, 4
+INDEX_MCP, MIDDLE_MCP, PINKY_MCP = 5, 9, 17
+# Joint chains (MCP, PIP, DIP, TIP) of the index, middle, ring and pinky fingers
+FINGER_CHAINS = np.array([[5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16], [17, 18, 19, 20]])
+
+# Angle-classifier thresholds
+FINGER_STRAIGHT_COS = 0.6  # cos of the total PIP + DIP bend below which a finger counts as folded (~53°)
+THUMB_STRAIGHT_COS = 0.5  # cos of the thumb IP bend
+THUMB_SPREAD = 0.3  # how far the thumb tip must sit outside the index knuckle, in palm widths
+
+# Gesture lookup indexed by the extended-finger bitmask (bit 0 = thumb ... bit 4 = pinky).
+# -1 means the finger combination is not a counting gesture.
+FINGER_BITS = 1 << np.arange(5)
+GESTURE_TABLE = np.full(32, -1, dtype=np.int8)
+GESTURE_TABLE[0b00010] = 1  # index
+GESTURE_TABLE[0b00110] = 2  # index + middle
+GESTURE_TABLE[0b01110] = 3  # index + middle + ring
+GESTURE_TABLE[0b11110] = 4  # four fingers, no thumb
+GESTURE_TABLE[0b11111] = 5  # whole hand
+
+
+def landmarks_to_array(landmarks) -> np.ndarray:
+    """Convert MediaPipe landmarks (or a hand_landmarks message) to a (21, 3) float32 array.
+
+    Arrays are passed through unchanged, so callers may hand in either form.
+    """
+    if isinstance(landmarks, np.ndarray):
+        return landmarks
+    if hasattr(landmarks, 'landmark'):
+        landmarks = landmarks.landmark
+
+    coords = chain.from_iterable((landmark.x, landmark.y, landmark.z) for landmark in landmarks)
+    return np.fromiter(coords, dtype=np.float32, count=NUM_LANDMARKS * 3).reshape(NUM_LANDMARKS, 3)
+
+
+def extended_fingers(points: np.ndarray) -> np.ndarray:
+    """Extended-finger flags of shape (..., 5), thumb first (from POC heuristics).
+
+    Thumb: tip to the right of its IP joint. Other fingers: tip above the PIP joint.
+    """
+    tips = points[..., FINGER_TIPS, :]
+    pips = points[..., FINGER_PIPS, :]
+
+    flags = np.empty(points.shape[:-2] + (5,), dtype=bool)
+    flags[..., 0] = tips[..., 0, 0] > pips[..., 0, 0]
+    flags[..., 1:] = tips[..., 1:, 1] < pips[..., 1:, 1]
+    return flags
+
+
+def handedness_sign(handedness) -> float:
+    """+1 for MediaPipe's 'Right' label, -1 for 'Left', 0 when unknown"""
+    if handedness == 'Right':
+        return 1.0
+    if handedness == 'Left':
+        return -1.0
+    return 0.0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-6)
+
+
+def _cos_between(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (_normalize(a) * _normalize(b)).sum(axis=-1)
+
+
+def extended_fingers_invariant(points: np.ndarray, handedness=None, aspect=1.0) -> np.ndarray:
+    """Extended-finger flags of shape (..., 5) that hold for either hand at any rotation.
+
+    Fingers are judged by how much they bend at the PIP and DIP joints, which does
+    not depend on how the hand is oriented in the image. The thumb is judged in a
+    hand-local frame (wrist -> middle knuckle is "up", index -> pinky knuckle is
+    "across"): it is extended when it is straight and its tip sits outside the
+    index knuckle. handedness ('Left'/'Right' or an array of signs, see
+    handedness_sign) orients the frame when the palm is seen edge-on. aspect is
+    the frame width / height (or an array of them, one per hand), so normalized
+    x and y share one scale.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    aspect = np.asarray(aspect, dtype=np.float32)[..., None, None]
+    scale = np.concatenate([aspect, np.ones_like(aspect), aspect], axis=-1)
+    points = points * scale
+
+    flags = np.empty(points.shape[:-2] + (5,), dtype=bool)
+
+    # Fingers: straight if the MCP->PIP and DIP->TIP segments point the same way
+    chains = points[..., FINGER_CHAINS, :]
+    proximal = chains[..., 1, :] - chains[..., 0, :]
+    distal = chains[..., 3, :] - chains[..., 2, :]
+    flags[..., 1:] = _cos_between(proximal, distal) > FINGER_STRAIGHT_COS
+
+    # Hand-local frame
+    up = _normalize(points[..., MIDDLE_MCP, :] - points[..., WRIST, :])
+    across = points[..., PINKY_MCP, :] - points[..., INDEX_MCP, :]
+    palm_width = np.linalg.norm(across, axis=-1)
+    across = across - (across * up).sum(axis=-1, keepdims=True) * up
+    across_norm = np.linalg.norm(across, axis=-1, keepdims=True)
+
+    # Palm seen edge-on: knuckles overlap, so fall back to the image-plane
+    # perpendicular of "up", pointing toward the pinky for the given hand
+    if isinstance(handedness, str) or handedness is None:
+        sign = handedness_sign(handedness)
+    else:
+        sign = np.asarray(handedness, dtype=np.float32)[..., None]
+    fallback = np.stack([-up[..., 1], up[..., 0], np.zeros_like(up[..., 0])], axis=-1) * sign
+    palm_length = np.linalg.norm(points[..., MIDDLE_MCP, :] - points[..., WRIST, :], axis=-1, keepdims=True)
+    across = np.where(across_norm > 0.2 * palm_length, across, fallback)
+    across = _normalize(across)
+
+    thumb_out = -((points[..., THUMB_TIP, :] - points[..., INDEX_MCP, :]) * across).sum(axis=-1)
+    thumb_straight = _cos_between(
+        points[..., THUMB_IP, :] - points[..., THUMB_MCP, :],
+        points[..., THUMB_TIP, :] - points[..., THUMB_IP, :]
+    ) > THUMB_STRAIGHT_COS
+    flags[..., 0] = thumb_straight & (thumb_out > THUMB_SPREAD * np.maximum(palm_width, 1e-6))
+    return flags
+
+
+def count_fingers_invariant(points, handedness=None, aspect=1.0) -> int:
+    """Number of extended fingers on one hand using the angle-based classifier"""
+    return int(extended_fingers_invariant(landmarks_to_array(points), handedness, aspect).sum())
+
+
+def count_fingers(points) -> int:
+    """Number of extended fingers on one hand"""
+    return int(extended_fingers(landmarks_to_array(points)).sum())
+
+
+def count_fingers_batch(points: np.ndarray) -> np.ndarray:
+    """Extended-finger counts for a (N, 21, 3) batch"""
+    return extended_fingers(points).sum(axis=-1, dtype=np.int8)
+
+
+def classify_gesture_batch(flags: np.ndarray) -> np.ndarray:
+    """Counting gesture (1-5) for each row of extended-finger flags, -1 when unrecognized"""
+    masks = (np.asarray(flags, dtype=np.uint8) * FINGER_BITS).sum(axis=-1)
+    return GESTURE_TABLE[masks]
+
+
+def classify_gesture(flags) -> Optional[int]:
+    """Counting gesture (1-5) for one hand's extended-finger flags, or None"""
+    gesture = int(classify_gesture_batch(np.asarray(flags)))
+    return gesture if gesture > 0 else None
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+from .stage_timer import record_stage
+
+logger = logging.getLogger(__name__)
+
+
+class FrameGrabber:
+    """Drains a cv2.VideoCapture on its own thread into a small preallocated ring buffer.
+
+    The device is read continuously so the driver never accumulates stale frames;
+    consumers ask for the newest frame with read_latest() and frames they never
+    asked for are counted in dropped_frames. Returned frames live in the ring and
+    are only valid until it wraps around - copy (or flip/convert) them right away.
+    """
+
+    def __init__(self, cap, buffer_size=4, stage_hooks=None):
+        self.cap = cap
+        self.buffer_size = max(2, buffer_size)
+        self.stage_hooks = stage_hooks if stage_hooks is not None else []  # see stage_timer.record_stage
+
+        self.is_running = False
+        self.thread = None
+        self.frame_seq = 0  # sequence number of the newest grabbed frame
+        self.dropped_frames = 0  # grabbed frames no consumer ever read
+        self._last_read_seq = 0
+        self._buffers = [None] * self.buffer_size
+        self._condition = threading.Condition()
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def _run(self):
+        while self.is_running and self.cap is not None and self.cap.isOpened():
+            slot = (self.frame_seq + 1) % self.buffer_size
+
+            # Passing the previous array lets OpenCV decode into it instead of allocating
+            start = time.perf_counter()
+            ret, frame = self.cap.read(self._buffers[slot])
+            record_stage(self.stage_hooks, 'grab', start)
+            if not ret or frame is None:
+                logger.warning("Frame grabber failed to read frame")
+                break
+
+            with self._condition:
+                self._buffers[slot] = frame
+                self.frame_seq += 1
+                self._condition.notify_all()
+
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+
+    def read_latest(self, last_seq=0, timeout=1.0):
+        """Wait for a frame newer than last_seq and return (seq, frame).
+
+        Returns (last_seq, None) on timeout or once the grabber has stopped.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self.is_running or self.frame_seq > last_seq,
+                timeout=timeout
+            )
+            if self.frame_seq <= last_seq:
+                return last_seq, None
+
+            seq = self.frame_seq
+            if self._last_read_seq:
+                self.dropped_frames += max(0, seq - self._last_read_seq - 1)
+            self._last_read_seq = seq
+            return seq, self._buffers[seq % self.buffer_size]
@@ -0,0 +1,313 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+import cv2
+
+from .finger_counter import landmarks_to_array
+from .frame_pool import FramePool, ScratchBuffer
+from .frame_pyramid import FramePyramid, fit_size
+from .frame_scheduler import FrameScheduler
+from .game_logging import log_fields
+from .hand_roi import HandRoiTracker
+from .stage_timer import record_stage
+
+logger = logging.getLogger(__name__)
+
+
+class FrameResult(NamedTuple):
+    """One captured frame together with the hand inference computed from it"""
+    seq: int
+    frame: Any  # mirrored BGR frame, shared by all consumers - copy before drawing on it
+    landmarks: Any  # MediaPipe hand landmarks of the first hand, or None
+    points: Any  # the same landmarks as a (21, 3) float32 array, or None
+    handedness: Optional[str]  # MediaPipe's 'Left' / 'Right' label for the hand, or None
+    finger_count: int
+    timestamp: float
+    slot: Any = None  # FramePool slot backing frame; see FramePipeline.wait_for_result(retain=True)
+    stream_frame: Any = None  # frame downscaled to the stream size (frame itself if already small enough);
+    # when backed by stream_slot it belongs to the broadcaster, which draws the overlay on it
+    stream_slot: Any = None  # FramePool slot backing stream_frame, if it is a separate image
+
+
+class FramePipeline:
+    """Single producer thread that flips and runs MediaPipe exactly once per frame.
+
+    Frames come from a FrameGrabber, so inference always runs on the newest
+    captured frame. Consumers (the gesture loop, every MJPEG viewer) never touch
+    the camera or the Hands graph themselves; they call wait_for_result() and
+    receive the newest FrameResult published after the one they saw last.
+
+    Capture, inference and stream resolutions are independent: each frame gets
+    one FramePyramid, from which MediaPipe reads a max_inference_size image and
+    viewers a stream_size image, so nothing is ever encoded at full resolution
+    unless a viewer asks for it.
+
+    Mirrored frames live in a shared-memory FramePool and every resize / color
+    conversion writes into reused buffers, so the steady state allocates no
+    per-frame image arrays.
+    """
+
+    def __init__(self, source, hands, count_fingers: Callable, max_inference_size=(1280, 720),
+                 scheduler: Optional[FrameScheduler] = None, roi_tracking=True, stream_size=None,
+                 stage_hooks=None, reacquire_hands=None):
+        self.source = source  # a FrameGrabber (anything with read_latest() / is_running)
+        self.hands = hands  # sees the ROI crops once a hand is tracked
+        # Full-frame detection runs in its own graph so MediaPipe's tracking never mixes crop and frame geometry
+        self.reacquire_hands = reacquire_hands or hands
+        self.count_fingers = count_fingers  # called as count_fingers(points, handedness=..., aspect=...)
+        self.max_inference_size = max_inference_size
+        self.stream_size = stream_size  # None streams the capture resolution
+        self.stream_enabled = True  # set by the broadcaster; skips the stream level when nobody watches
+        self.scheduler = scheduler or FrameScheduler()
+        self.roi_tracker = HandRoiTracker() if roi_tracking else None
+        self.stage_hooks = stage_hooks if stage_hooks is not None else []  # see stage_timer.record_stage
+
+        self.frame_pool: Optional[FramePool] = None
+        self.stream_pool: Optional[FramePool] = None
+        self._stream_slot = None
+        self._resize_buffer = ScratchBuffer()
+        self._rgb_buffer = ScratchBuffer()
+
+        self.pyramid = FramePyramid()
+        self.pyramid.add_level('inference', max_inference_size)
+        # INTER_AREA costs ~5x INTER_LINEAR on fractional downscales such as 720p -> 540p
+        self.pyramid.add_level('stream', stream_size, allocate=self._allocate_stream_frame, interpolation=None)
+
+        self.is_running = False
+        self.thread = None
+        self._condition = threading.Condition()
+        self._latest: Optional[FrameResult] = None
+        self._seq = 0
+        self.timestamp_mismatches = 0
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self.scheduler.stop()
+        with self._condition:
+            self._condition.notify_all()
+
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+        with self._condition:
+            latest, self._latest = self._latest, None
+        if latest is not None:
+            self.release(latest)
+        if self.frame_pool is not None:
+            self.frame_pool.close()
+            self.frame_pool = None
+        if self.stream_pool is not None:
+            self.stream_pool.close()
+            self.stream_pool = None
+
+    @property
+    def frames_processed(self):
+        return self._seq
+
+    def latest(self) -> Optional[FrameResult]:
+        with self._condition:
+            return self._latest
+
+    def wait_for_result(self, last_seq=0, timeout=1.0, retain=False) -> Optional[FrameResult]:
+        """Block until a result newer than last_seq is published.
+
+        Returns None on timeout or when the pipeline stops. Slow consumers skip
+        straight to the newest frame instead of queueing old ones. Consumers that
+        read result.frame pass retain=True and call release(result) when done, so
+        the pool slot is not reused underneath them.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self.is_running or (self._latest is not None and self._latest.seq > last_seq),
+                timeout=timeout
+            )
+            if self._latest is not None and self._latest.seq > last_seq:
+                if retain:
+                    for slot in (self._latest.slot, self._latest.stream_slot):
+                        if slot is not None:
+                            slot.retain()
+                return self._latest
+            return None
+
+    def release(self, result: FrameResult):
+        """Drop a reference taken with wait_for_result(retain=True)"""
+        for slot in (result.slot, result.stream_slot):
+            if slot is not None:
+                slot.release()
+
+    def _mirror(self, frame):
+        """Flip frame horizontally into a pool slot; returns (mirrored frame, slot or None)"""
+        if self.frame_pool is None or self.frame_pool.frame_shape != frame.shape:
+            if self.frame_pool is not None:
+                self.frame_pool.close()
+            self.frame_pool = FramePool(frame.shape)
+
+        slot = self.frame_pool.acquire()
+        if slot is None:
+            # Every slot is held by a consumer - allocate rather than stall
+            return cv2.flip(frame, 1), None
+        return cv2.flip(frame, 1, dst=slot.frame), slot
+
+    def _allocate_stream_frame(self, height, width):
+        """Pool memory for the stream level, which outlives the frame loop iteration"""
+        shape = (height, width, 3)
+        if self.stream_pool is None or self.stream_pool.frame_shape != shape:
+            if self.stream_pool is not None:
+                self.stream_pool.close()
+            self.stream_pool = FramePool(shape)
+
+        self._stream_slot = self.stream_pool.acquire()
+        return self._stream_slot.frame if self._stream_slot is not None else None
+
+    def _prepare_inference_frame(self, frame, hands, full_frame=False):
+        """Downscale frames larger than max_inference_size and convert them to RGB for MediaPipe.
+
+        The full frame comes from the pyramid's inference level; ROI crops are
+        resized here.
+        """
+        start = time.perf_counter()
+        if full_frame:
+            frame = self.pyramid.level('inference')
+        else:
+            height, width = frame.shape[:2]
+            new_width, new_height = fit_size(width, height, self.max_inference_size)
+            if (new_width, new_height) != (width, height):
+                frame = cv2.resize(frame, (new_width, new_height),
+                                   dst=self._resize_buffer.view(new_height, new_width))
+        record_stage(self.stage_hooks, 'resize', start)
+
+        height, width = frame.shape[:2]
+        if hasattr(hands, 'input_buffer'):
+            # Convert straight into the inference worker's shared memory
+            rgb_frame = hands.input_buffer(height, width)
+        else:
+            rgb_frame = self._rgb_buffer.view(height, width)
+
+        start = time.perf_counter()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+        record_stage(self.stage_hooks, 'cvtcolor', start)
+        return rgb_frame
+
+    def _process(self, hands, rgb_frame):
+        start = time.perf_counter()
+        results = hands.process(rgb_frame)
+        record_stage(self.stage_hooks, 'inference', start)
+        return results
+
+    def _infer(self, frame):
+        """Run MediaPipe on the tracked hand ROI (or the full frame) and return its results.
+
+        Landmarks in the results are always full-frame normalized coordinates.
+        """
+        if self.roi_tracker is None:
+            return self._process(self.hands, self._prepare_inference_frame(frame, self.hands, full_frame=True))
+
+        # The ROI stays put while the hand moves inside it, so the crop graph sees a steady geometry
+        image, roi = self.roi_tracker.crop(frame)
+        if roi is not None:
+            results = self._process(self.hands, self._prepare_inference_frame(image, self.hands))
+            if not results.multi_hand_landmarks:
+                # Hand left the ROI - reacquire it on this frame with full-frame detection
+                roi = None
+        if roi is None:
+            results = self._process(self.reacquire_hands,
+                                    self._prepare_inference_frame(frame, self.reacquire_hands, full_frame=True))
+
+        hand_landmarks = results.multi_hand_landmarks[0] if results.multi_hand_landmarks else None
+        if hand_landmarks is not None:
+            self.roi_tracker.map_to_frame(hand_landmarks, roi, frame.shape)
+        self.roi_tracker.update(hand_landmarks, frame.shape)
+        return results
+
+    def _run(self):
+        logger.info("🤖 Starting frame pipeline")
+
+        grab_seq = 0
+        while self.is_running:
+            grab_seq, frame = self.source.read_latest(grab_seq)
+            if frame is None:
+                if not self.source.is_running:
+                    logger.error("❌ Failed to read frame")
+                    break
+                continue
+
+            self.scheduler.begin_frame()
+
+            # Flip frame horizontally for mirror effect (this also copies it out of the grabber ring)
+            start = time.perf_counter()
+            frame, slot = self._mirror(frame)
+            record_stage(self.stage_hooks, 'flip', start)
+            self.pyramid.reset(frame)
+
+            # Landmarks are normalized, so inference on a downscaled copy or ROI maps onto the full frame
+            try:
+                results = self._infer(frame)
+            except ValueError as e:
+                if "Packet timestamp mismatch" in str(e):
+                    logger.warning("⚠️ MediaPipe timestamp mismatch, skipping frame", extra=log_fields('pipeline'))
+                    self.timestamp_mismatches += 1
+                    if self.roi_tracker:
+                        self.roi_tracker.reset()
+                    if slot is not None:
+                        slot.release()
+                    continue
+                logger.error("❌ MediaPipe error: %s", e)
+                if slot is not None:
+                    slot.release()
+                break
+
+            landmarks = None
+            points = None
+            handedness = None
+            finger_count = 0
+            if results.multi_hand_landmarks:
+                landmarks = results.multi_hand_landmarks[0]
+                points = landmarks_to_array(landmarks)
+                if results.multi_handedness:
+                    # The frame is already mirrored, so MediaPipe's labels match the child's hand
+                    handedness = results.multi_handedness[0].classification[0].label
+                height, width = frame.shape[:2]
+                start = time.perf_counter()
+                finger_count = self.count_fingers(points, handedness=handedness, aspect=width / height)
+                record_stage(self.stage_hooks, 'counting', start)
+
+            # Downscale for viewers after inference, reusing the inference level when it is large enough
+            stream_frame, stream_slot = None, None
+            if self.stream_enabled:
+                self._stream_slot = None
+                start = time.perf_counter()
+                stream_frame = self.pyramid.level('stream')
+                stream_slot = self._stream_slot
+                record_stage(self.stage_hooks, 'stream_resize', start)
+
+            with self._condition:
+                self._seq += 1
+                previous = self._latest
+                self._latest = FrameResult(self._seq, frame, landmarks, points, handedness,
+                                           finger_count, time.time(), slot, stream_frame, stream_slot)
+                self._condition.notify_all()
+
+            # The pipeline holds one reference to the latest frame only
+            if previous is not None:
+                self.release(previous)
+
+            # Sleep only for what is left of the frame interval, slower while no hand is in view
+            self.scheduler.end_frame(landmarks is not None)
+
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+
+        logger.info("🤖 Frame pipeline ended")
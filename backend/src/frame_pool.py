@@ -0,0 +1,91 @@
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameSlot:
+    """One preallocated frame in a FramePool; hold it with retain() and give it back with release()"""
+
+    def __init__(self, pool, index, frame):
+        self.pool = pool
+        self.index = index
+        self.frame = frame
+        self.ref_count = 0
+
+    def retain(self):
+        with self.pool.lock:
+            self.ref_count += 1
+        return self
+
+    def release(self):
+        with self.pool.lock:
+            self.ref_count = max(0, self.ref_count - 1)
+
+
+class FramePool:
+    """Fixed set of frames in one multiprocessing.shared_memory block, with reference-counted slots.
+
+    acquire() hands out a free slot (reference count 0) already retained once, so
+    a steady-state frame loop reuses the same few buffers instead of allocating a
+    new array per frame. Other processes can attach to the block by name.
+    """
+
+    def __init__(self, frame_shape, num_slots=6, dtype=np.uint8):
+        self.frame_shape = tuple(frame_shape)
+        self.num_slots = num_slots
+        self.dtype = np.dtype(dtype)
+        self.lock = threading.Lock()
+
+        frame_bytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes * num_slots)
+        self._array = np.ndarray((num_slots,) + self.frame_shape, dtype=self.dtype, buffer=self.shm.buf)
+        self.slots = [FrameSlot(self, index, self._array[index]) for index in range(num_slots)]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def acquire(self):
+        """Return a free slot retained once, or None if every slot is in use"""
+        with self.lock:
+            for slot in self.slots:
+                if slot.ref_count == 0:
+                    slot.ref_count = 1
+                    return slot
+        return None
+
+    @property
+    def free_count(self):
+        with self.lock:
+            return sum(1 for slot in self.slots if slot.ref_count == 0)
+
+    def close(self):
+        for slot in self.slots:
+            slot.frame = None
+        self._array = None
+
+        try:
+            self.shm.close()
+        except BufferError:
+            # A consumer still holds a view of a frame; the mapping goes away with it
+            pass
+        self.shm.unlink()
+
+
+class ScratchBuffer:
+    """Reusable flat buffer handing out contiguous (height, width, channels) views.
+
+    Lets cv2.resize / cv2.cvtColor write into the same memory every frame via
+    dst=, even when the size changes from frame to frame (e.g. ROI crops). The
+    buffer only grows when a larger view is requested.
+    """
+
+    def __init__(self, size=0, dtype=np.uint8):
+        self._buffer = np.empty(size, dtype=dtype)
+
+    def view(self, height, width, channels=3):
+        needed = height * width * channels
+        if needed > self._buffer.size:
+            self._buffer = np.empty(needed, dtype=self._buffer.dtype)
+        return self._buffer[:needed].reshape(height, width, channels)
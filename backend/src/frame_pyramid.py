@@ -0,0 +1,86 @@
+from typing import Callable, Optional
+
+import cv2
+
+from .frame_pool import ScratchBuffer
+
+
+def fit_size(width, height, max_size):
+    """Largest (width, height) with the same aspect ratio that fits in max_size; never upscales"""
+    if max_size is None:
+        return width, height
+    max_width, max_height = max_size
+    scale = min(max_width / width, max_height / height, 1.0)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def downscale_interpolation(source_size, target_size):
+    """INTER_AREA for exact integer downscales (where it is a cheap box filter), INTER_LINEAR otherwise"""
+    (source_width, source_height), (target_width, target_height) = source_size, target_size
+    if (source_width % target_width == 0 and source_height % target_height == 0
+            and source_width // target_width == source_height // target_height):
+        return cv2.INTER_AREA
+    return cv2.INTER_LINEAR
+
+
+class FramePyramid:
+    """Named downscales of one frame, each computed at most once per frame and only when asked for.
+
+    Every level has a maximum (width, height). A level is resized from the
+    smallest level already computed for this frame that is still large enough,
+    so e.g. a 1080p capture is downscaled to 720p for inference and that 720p
+    image to 540p for the stream, instead of resizing the full frame twice.
+    Levels write into reused buffers: a ScratchBuffer by default (valid until
+    the next reset), or memory from the level's allocate(height, width) callback
+    when the image has to outlive the frame. Images of a level are shared
+    views and may be the base frame itself when no downscale is needed. A level
+    added with interpolation=None picks one per resize (downscale_interpolation)
+    and prefers a source it can downscale by an exact integer factor.
+    """
+
+    def __init__(self):
+        self._levels = {}  # name -> (max_size, allocate, interpolation, scratch)
+        self._base = None
+        self._images = {}
+
+    def add_level(self, name, max_size, allocate: Optional[Callable] = None, interpolation=cv2.INTER_LINEAR):
+        self._levels[name] = (max_size, allocate, interpolation, ScratchBuffer())
+
+    def reset(self, frame):
+        """Start a new frame; images from the previous frame must no longer be used"""
+        self._base = frame
+        self._images = {}
+
+    def level(self, name):
+        image = self._images.get(name)
+        if image is not None:
+            return image
+
+        max_size, allocate, interpolation, scratch = self._levels[name]
+        height, width = self._base.shape[:2]
+        target_width, target_height = fit_size(width, height, max_size)
+
+        if (target_width, target_height) == (width, height):
+            image = self._base
+        else:
+            # Smallest image computed so far that still covers the target size; with automatic
+            # interpolation an exact integer downscale (e.g. 1080p -> 540p) is cheaper still
+            covering = [candidate for candidate in (self._base, *self._images.values())
+                        if candidate.shape[1] >= target_width and candidate.shape[0] >= target_height]
+            if interpolation is None:
+                covering = [candidate for candidate in covering
+                            if downscale_interpolation(candidate.shape[1::-1], (target_width, target_height))
+                            == cv2.INTER_AREA] or covering
+            source = min(covering, key=lambda candidate: candidate.shape[1])
+
+            if allocate:
+                # None from the allocator means "no reusable memory right now" - let OpenCV allocate
+                dst = allocate(target_height, target_width)
+            else:
+                dst = scratch.view(target_height, target_width, self._base.shape[2])
+            if interpolation is None:
+                interpolation = downscale_interpolation(source.shape[1::-1], (target_width, target_height))
+            image = cv2.resize(source, (target_width, target_height), dst=dst, interpolation=interpolation)
+
+        self._images[name] = image
+        return image
@@ -0,0 +1,55 @@
+import threading
+import time
+
+
+class FrameScheduler:
+    """Paces a frame loop to a target FPS, slowing down while no hand is in view.
+
+    Each tick sleeps only for what is left of the frame interval after the actual
+    capture and inference work, so the real rate matches the target instead of
+    drifting. When no hand has been seen for idle_after seconds the loop drops to
+    idle_fps, and it returns to target_fps on the first frame with a hand.
+    """
+
+    def __init__(self, target_fps=20.0, idle_fps=5.0, idle_after=3.0):
+        self.target_fps = target_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+
+        self.last_hand_time = time.monotonic()
+        self._tick_start = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_idle(self):
+        return time.monotonic() - self.last_hand_time >= self.idle_after
+
+    @property
+    def current_fps(self):
+        return self.idle_fps if self.is_idle else self.target_fps
+
+    def begin_frame(self):
+        """Mark the start of a frame's work"""
+        self._tick_start = time.monotonic()
+
+    def end_frame(self, hand_seen):
+        """Record whether a hand was seen and sleep for the rest of the frame interval"""
+        now = time.monotonic()
+        if hand_seen:
+            self.last_hand_time = now
+
+        if self._tick_start is None:
+            return
+
+        remaining = 1.0 / self.current_fps - (now - self._tick_start)
+        self._tick_start = None
+        if remaining > 0:
+            # Event.wait so stop() can interrupt a long idle sleep
+            self._stop_event.wait(remaining)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def reset(self):
+        """Return to full rate, e.g. when a new game phase starts expecting a hand"""
+        self.last_hand_time = time.monotonic()
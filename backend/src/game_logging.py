@@ -0,0 +1,167 @@
+"""Structured, non-blocking logging for the server.
+
+Threads that log (frame pipeline, gesture loop, Socket.IO handlers) only build a
+record and put it on an in-memory queue; a QueueListener thread does the actual
+write to stderr or the journal, so a slow SD card never stalls a frame. When
+the queue is full, records are dropped and counted rather than blocking.
+
+Records carry a category and key=value fields:
+
+    log = logging.getLogger(__name__)
+    log.info("🔢 Detected: %d fingers", count, extra=log_fields('gesture', session=session_id, number=count))
+
+High-frequency categories are sampled per (category, session): at most
+`limit` records every `window` seconds. The number of suppressed records is
+attached to the next record that gets through.
+"""
+
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# category -> (records allowed, per window in seconds)
+DEFAULT_SAMPLING = {
+    'gesture': (10, 5.0),  # count changes and lost hands, one per debounced transition
+    'pipeline': (3, 10.0),  # per-frame pipeline warnings such as MediaPipe timestamp mismatches
+}
+
+_handler = None
+_listener = None
+
+
+def log_fields(category=None, **fields):
+    """extra= argument for a structured record"""
+    return {'category': category, 'fields': fields}
+
+
+class FieldsAdapter(logging.LoggerAdapter):
+    """Logger adapter adding fixed fields (e.g. the session id) to every record"""
+
+    def process(self, msg, kwargs):
+        extra = kwargs.get('extra') or {}
+        kwargs['extra'] = log_fields(extra.get('category'), **{**self.extra, **extra.get('fields', {})})
+        return msg, kwargs
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits records per (category, session), counting what it suppresses"""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(DEFAULT_SAMPLING if rates is None else rates)
+        self.lock = threading.Lock()
+        self.windows = {}  # (category, session) -> [window start, records passed, records suppressed]
+        self.suppressed_total = 0
+
+    def filter(self, record):
+        category = getattr(record, 'category', None)
+        rate = self.rates.get(category)
+        if rate is None:
+            return True
+
+        limit, window = rate
+        fields = getattr(record, 'fields', None) or {}
+        key = (category, fields.get('session'))
+        now = time.monotonic()
+        with self.lock:
+            state = self.windows.get(key)
+            if state is None or now - state[0] >= window:
+                suppressed = state[2] if state else 0
+                state = self.windows[key] = [now, 0, 0]
+            else:
+                suppressed = 0
+
+            if state[1] >= limit:
+                state[2] += 1
+                self.suppressed_total += 1
+                return False
+            state[1] += 1
+
+        if suppressed:
+            record.fields = {**fields, 'suppressed': suppressed}
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats records as 'time level logger: message key=value ...' or as JSON lines"""
+
+    def __init__(self, json_lines=False):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        category = getattr(record, 'category', None)
+        if self.json_lines:
+            entry = {'time': record.created, 'level': record.levelname, 'logger': record.name,
+                     'message': record.getMessage()}
+            if category:
+                entry['category'] = category
+            entry.update(fields)
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        line = super().format(record)
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+def setup_logging(level=logging.INFO, json_lines=False, sampling=None, stream=None, queue_size=10_000):
+    """Route all logging through a bounded queue to a background writer thread.
+
+    Safe to call more than once; later calls only change the level.
+    """
+    global _handler, _listener
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _listener is not None:
+        return _handler
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(StructuredFormatter(json_lines))
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    _handler.addFilter(SamplingFilter(sampling))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _handler
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger().removeHandler(_handler)
+
+
+def logging_stats():
+    """{'dropped': records lost to a full queue, 'suppressed': records removed by sampling}"""
+    if _handler is None:
+        return {'dropped': 0, 'suppressed': 0}
+    sampler = next(f for f in _handler.filters if isinstance(f, SamplingFilter))
+    return {'dropped': _handler.dropped, 'suppressed': sampler.suppressed_total}
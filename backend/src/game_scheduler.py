@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A scheduled callback; cancel() stops it from running if it hasn't yet"""
+
+    def __init__(self, when, callback, args, group=None):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.group = group
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class GameScheduler:
+    """Runs game-flow callbacks on one thread instead of a threading.Timer per step.
+
+    call_later() returns a TimerHandle that can be cancelled, and cancel_all()
+    drops every pending callback (optionally only those of one group), so a
+    restart can never be followed by a stale transition from the previous round.
+    """
+
+    def __init__(self):
+        self.is_running = False
+        self.thread = None
+        self._condition = threading.Condition()
+        self._heap = []
+        self._counter = itertools.count()
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        with self._condition:
+            self.is_running = False
+            self._condition.notify_all()
+
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def call_later(self, delay, callback, *args, group=None) -> TimerHandle:
+        handle = TimerHandle(time.monotonic() + delay, callback, args, group)
+        with self._condition:
+            heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+            self._condition.notify_all()
+        return handle
+
+    def cancel_all(self, group=None):
+        """Cancel every pending callback, or only those scheduled with the given group"""
+        with self._condition:
+            for _, _, handle in self._heap:
+                if group is None or handle.group == group:
+                    handle.cancel()
+
+    @property
+    def pending_count(self):
+        with self._condition:
+            return sum(1 for _, _, handle in self._heap if not handle.cancelled)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self.is_running:
+                    # Drop cancelled handles from the front so they don't delay the wait
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+
+                    if self._heap and self._heap[0][0] <= time.monotonic():
+                        break
+
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+
+                if not self.is_running:
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+
+            if handle.cancelled:
+                continue
+
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                logger.exception("❌ Error in scheduled callback %s: %s",
+                                 getattr(handle.callback, '__name__', handle.callback), e)
@@ -1,74 +1,54 @@
 import cv2
 import mediapipe as mp
-import numpy as np
 import logging
 
+from . import finger_counter
+from .frame_pool import ScratchBuffer
+from .hand_roi import HandRoiTracker
+
 class GestureDetector:
-    def __init__(self):
+    def __init__(self, roi_tracking=True, finger_classifier='angles'):
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        hands_kwargs = dict(
             static_image_mode=False,
             max_num_hands=1,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5
         )
+        self.hands = self.mp_hands.Hands(**hands_kwargs)
+        # With ROI tracking, full-frame detection gets its own graph so tracking never mixes crop and frame geometry
+        self.reacquire_hands = self.mp_hands.Hands(**hands_kwargs) if roi_tracking else self.hands
         self.mp_draw = mp.solutions.drawing_utils
         self.last_detected_number = None
+        self.roi_tracker = HandRoiTracker() if roi_tracking else None
+        self.finger_classifier = finger_classifier
 
-    def _count_extended_fingers(self, landmarks):
-        finger_tips = [4, 8, 12, 16, 20]
-        finger_pips = [3, 6, 10, 14, 18]
-
-        extended_fingers = []
+        # Reused destinations for resize / color conversion, so detection allocates no per-frame images
+        self._resize_buffer = ScratchBuffer()
+        self._rgb_buffer = ScratchBuffer()
 
-        # Thumb (different logic due to different orientation)
-        if landmarks[finger_tips[0]].x > landmarks[finger_pips[0]].x:
-            extended_fingers.append(1)
+    def _count_extended_fingers(self, landmarks, handedness=None, aspect=1.0):
+        points = finger_counter.landmarks_to_array(landmarks)
+        if self.finger_classifier == 'legacy':
+            flags = finger_counter.extended_fingers(points)
         else:
-            extended_fingers.append(0)
-
-        # Other fingers
-        for i in range(1, 5):
-            if landmarks[finger_tips[i]].y < landmarks[finger_pips[i]].y:
-                extended_fingers.append(1)
-            else:
-                extended_fingers.append(0)
-
-        return extended_fingers
+            flags = finger_counter.extended_fingers_invariant(points, handedness, aspect)
+        return flags.astype(int).tolist()
 
     def _classify_gesture(self, extended_fingers):
-        total_extended = sum(extended_fingers)
-
-        if total_extended == 0:
-            return None
-        elif total_extended == 1:
-            # Check if it's index finger only
-            if extended_fingers[1] == 1 and sum(extended_fingers[0:1] + extended_fingers[2:]) == 0:
-                return 1
-        elif total_extended == 2:
-            # Peace sign - index and middle finger
-            if extended_fingers[1] == 1 and extended_fingers[2] == 1 and sum(extended_fingers[0:1] + extended_fingers[3:]) == 0:
-                return 2
-        elif total_extended == 3:
-            # Three fingers - index, middle, ring
-            if extended_fingers[1] == 1 and extended_fingers[2] == 1 and extended_fingers[3] == 1 and extended_fingers[0] == 0 and extended_fingers[4] == 0:
-                return 3
-        elif total_extended == 4:
-            # Four fingers (no thumb)
-            if sum(extended_fingers[1:]) == 4 and extended_fingers[0] == 0:
-                return 4
-        elif total_extended == 5:
-            # All fingers extended
-            if all(extended_fingers):
-                return 5
-
-        return None
+        return finger_counter.classify_gesture(extended_fingers)
 
     def detect_gesture(self, frame):
         # Ensure frame is valid and properly formatted
         if frame is None or frame.size == 0:
             return None, None
 
+        full_frame = frame
+        roi = None
+        if self.roi_tracker:
+            # Only look where the hand was last frame; landmarks are mapped back below
+            frame, roi = self.roi_tracker.crop(frame)
+
         # MediaPipe works better with smaller resolutions - resize if too large
         height, width = frame.shape[:2]
         if width > 1280 or height > 720:
@@ -76,25 +56,40 @@ class GestureDetector:
             scale_factor = min(1280/width, 720/height)
             new_width = int(width * scale_factor)
             new_height = int(height * scale_factor)
-            frame = cv2.resize(frame, (new_width, new_height))
+            frame = cv2.resize(frame, (new_width, new_height),
+                               dst=self._resize_buffer.view(new_height, new_width))
 
-        # Ensure frame is contiguous in memory
-        if not frame.flags['C_CONTIGUOUS']:
-            frame = np.ascontiguousarray(frame)
+        # cvtColor reads strided ROI crops directly and writes a contiguous RGB frame
+        height, width = frame.shape[:2]
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb_buffer.view(height, width))
+        hands = self.hands if roi is not None else self.reacquire_hands
+        results = hands.process(rgb_frame)
 
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
+        if roi is not None and not results.multi_hand_landmarks:
+            # Hand left the ROI - fall back to full-frame detection
+            self.roi_tracker.reset()
+            return self.detect_gesture(full_frame)
 
         detected_number = None
         hand_landmarks = None
 
         if results.multi_hand_landmarks:
-            for landmarks in results.multi_hand_landmarks:
+            for index, landmarks in enumerate(results.multi_hand_landmarks):
                 hand_landmarks = landmarks
-                extended_fingers = self._count_extended_fingers(landmarks.landmark)
+                if self.roi_tracker:
+                    self.roi_tracker.map_to_frame(landmarks, roi, full_frame.shape)
+                handedness = None
+                if results.multi_handedness:
+                    handedness = results.multi_handedness[index].classification[0].label
+                full_height, full_width = full_frame.shape[:2]
+                extended_fingers = self._count_extended_fingers(
+                    landmarks.landmark, handedness, full_width / full_height)
                 detected_number = self._classify_gesture(extended_fingers)
                 break
 
+        if self.roi_tracker:
+            self.roi_tracker.update(hand_landmarks, full_frame.shape)
+
         # Update last detected number if we have a valid detection
         if detected_number is not None:
             self.last_detected_number = detected_number
@@ -109,4 +104,6 @@ class GestureDetector:
 
     def cleanup(self):
         if self.hands:
-            self.hands.close()
\ No newline at end of file
+            self.hands.close()
+        if self.reacquire_hands is not self.hands:
+            self.reacquire_hands.close()
\ No newline at end of file
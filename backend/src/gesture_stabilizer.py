@@ -0,0 +1,61 @@
+from collections import Counter, deque
+from typing import Optional
+
+
+class GestureStabilizer:
+    """Debounces per-frame finger counts into stable gesture transitions.
+
+    Keeps a sliding window of the last window_ms of observations (a finger count,
+    or None when no hand is visible) and takes a majority vote. A new value only
+    becomes the stable gesture once it holds at least enter_ratio of the window
+    for min_dwell_ms, and only while the current value has fallen below
+    exit_ratio (hysteresis). Everything is measured in time rather than frames so
+    behaviour does not change with the inference rate.
+    """
+
+    def __init__(self, window_ms=400, enter_ratio=0.6, exit_ratio=0.4, min_dwell_ms=250):
+        self.window_ms = window_ms
+        self.enter_ratio = enter_ratio
+        self.exit_ratio = exit_ratio
+        self.min_dwell_ms = min_dwell_ms
+        self.reset()
+
+    def reset(self):
+        self.current: Optional[int] = None
+        self.confidence = 0.0  # share of the window voting for the current value
+        self._samples = deque()
+        self._candidate = None
+        self._candidate_since = None
+
+    def update(self, value: Optional[int], timestamp: float) -> bool:
+        """Add one observation (timestamp in seconds); return True if the stable value changed"""
+        now_ms = timestamp * 1000.0
+        self._samples.append((now_ms, value))
+        while self._samples and now_ms - self._samples[0][0] > self.window_ms:
+            self._samples.popleft()
+
+        votes = Counter(sample_value for _, sample_value in self._samples)
+        total = len(self._samples)
+        majority, majority_votes = votes.most_common(1)[0]
+        self.confidence = votes[self.current] / total
+
+        if majority == self.current or majority_votes / total < self.enter_ratio:
+            self._candidate = None
+            return False
+
+        if votes[self.current] / total >= self.exit_ratio:
+            # The current gesture is still well represented - hold it
+            self._candidate = None
+            return False
+
+        if majority != self._candidate:
+            self._candidate = majority
+            self._candidate_since = now_ms
+
+        if now_ms - self._candidate_since < self.min_dwell_ms:
+            return False
+
+        self.current = majority
+        self.confidence = majority_votes / total
+        self._candidate = None
+        return True
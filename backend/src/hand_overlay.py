@@ -0,0 +1,30 @@
+import cv2
+import numpy as np
+
+from .finger_counter import FINGER_CHAINS, WRIST
+
+# MediaPipe's 21 HAND_CONNECTIONS as six open polylines: the thumb, the four
+# fingers (the pinky starting at the wrist) and the knuckle line across the palm
+HAND_POLYLINES = (
+    [WRIST, 1, 2, 3, 4],
+    *FINGER_CHAINS[:3].tolist(),
+    [WRIST, *FINGER_CHAINS[3].tolist()],
+    [WRIST, *FINGER_CHAINS[:, 0].tolist()],
+)
+
+
+def draw_hand_overlay(frame, points, point_radius=5, point_color=(0, 255, 0), line_color=(255, 255, 255),
+                      line_thickness=2):
+    """Draw the hand skeleton from a (21, 3) normalized landmark array onto frame in place.
+
+    Same picture as drawing 21 cv2.circle and 21 cv2.line calls, but with the
+    pixel coordinates computed in one array operation and two cv2.polylines calls.
+    """
+    height, width = frame.shape[:2]
+    pixels = (np.asarray(points)[:, :2] * (width, height)).astype(np.int32)
+
+    # A zero-length segment drawn with a thick pen is a filled dot
+    dots = np.repeat(pixels[:, None, :], 2, axis=1)
+    cv2.polylines(frame, list(dots), False, point_color, 2 * point_radius)
+    cv2.polylines(frame, [pixels[chain] for chain in HAND_POLYLINES], False, line_color, line_thickness)
+    return frame
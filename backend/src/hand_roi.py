@@ -0,0 +1,94 @@
+class HandRoiTracker:
+    """Crops inference input to a padded box around the hand seen in the previous frame.
+
+    While a hand is tracked, MediaPipe only sees the region of interest, and the
+    landmarks it returns are mapped back to full-frame normalized coordinates so
+    callers never see the crop. When the hand is lost the tracker falls back to
+    full-frame detection.
+
+    The ROI stays put while the hand stays inside its inner margin and still
+    fills enough of it. MediaPipe's tracking mode predicts the next hand position
+    in coordinates of its previous input, so a crop that moved every frame would
+    defeat the tracking it relies on.
+    """
+
+    def __init__(self, padding=0.6, min_size=0.25, inner_margin=0.12, min_fill=0.5):
+        self.padding = padding  # extra margin around the landmark box, relative to its size
+        self.min_size = min_size  # smallest ROI side, as a fraction of the shorter frame side
+        self.inner_margin = inner_margin  # keep the ROI while the hand is this far inside it (fraction of its side)
+        self.min_fill = min_fill  # re-place the ROI once the padded hand box shrinks below this share of it
+        self.roi = None  # (x0, y0, x1, y1) in pixels, or None for full-frame detection
+        self.roi_side = 0.0  # wanted side the current ROI was placed for
+        self.placements = 0  # ROIs placed so far; each one changes the tracking graph's input geometry
+
+    def reset(self):
+        self.roi = None
+
+    def crop(self, frame):
+        """Return (image, roi) to run inference on; roi is None for the full frame"""
+        if self.roi is None:
+            return frame, None
+
+        x0, y0, x1, y1 = self.roi
+        return frame[y0:y1, x0:x1], self.roi
+
+    def map_to_frame(self, hand_landmarks, roi, frame_shape):
+        """Rewrite ROI-relative landmarks in place as full-frame normalized coordinates"""
+        if roi is None:
+            return
+
+        height, width = frame_shape[:2]
+        x0, y0, x1, y1 = roi
+        roi_width = x1 - x0
+        roi_height = y1 - y0
+
+        for landmark in hand_landmarks.landmark:
+            landmark.x = (x0 + landmark.x * roi_width) / width
+            landmark.y = (y0 + landmark.y * roi_height) / height
+            # z uses roughly the same scale as x
+            landmark.z = landmark.z * roi_width / width
+
+    def update(self, hand_landmarks, frame_shape):
+        """Compute the next frame's ROI from full-frame landmarks, or drop it if the hand was lost"""
+        if hand_landmarks is None:
+            self.roi = None
+            return
+
+        height, width = frame_shape[:2]
+        xs = [landmark.x * width for landmark in hand_landmarks.landmark]
+        ys = [landmark.y * height for landmark in hand_landmarks.landmark]
+        box = (min(xs), min(ys), max(xs), max(ys))
+
+        # Square box around the hand so rotating fingers stay inside the crop
+        side = max(box[2] - box[0], box[3] - box[1]) * (1 + 2 * self.padding)
+        side = max(side, self.min_size * min(width, height))
+
+        if self.roi is not None and self._keeps(box, side, width, height):
+            return
+        self.roi_side = side
+
+        center_x = (box[0] + box[2]) / 2
+        center_y = (box[1] + box[3]) / 2
+        x0 = max(0, int(center_x - side / 2))
+        y0 = max(0, int(center_y - side / 2))
+        x1 = min(width, int(center_x + side / 2))
+        y1 = min(height, int(center_y + side / 2))
+
+        # A box covering most of the frame saves nothing - use full-frame detection
+        if x1 - x0 <= 1 or y1 - y0 <= 1 or (x1 - x0) * (y1 - y0) > 0.8 * width * height:
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
+            self.placements += 1
+
+    def _keeps(self, box, side, width, height):
+        """Whether the current ROI still suits a hand with this landmark box and wanted ROI side"""
+        # A hand that grew runs into the margins below; one that shrank wastes the crop
+        if side < self.min_fill * self.roi_side:
+            return False
+
+        # Edges on the frame border need no margin - the hand can't move past them
+        x0, y0, x1, y1 = self.roi
+        margin = self.inner_margin * self.roi_side
+        return ((x0 == 0 or box[0] >= x0 + margin) and (y0 == 0 or box[1] >= y0 + margin)
+                and (x1 == width or box[2] <= x1 - margin) and (y1 == height or box[3] <= y1 - margin))
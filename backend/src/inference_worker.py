@@ -0,0 +1,154 @@
+import multiprocessing as mp_process
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from .frame_pool import ScratchBuffer
+from .frame_pyramid import fit_size
+
+# Shared buffer size when inference frames are not capped (max_inference_size=None)
+DEFAULT_MAX_FRAME_SIZE = (1280, 720)
+
+
+def _frame_view(buffer, height, width):
+    """Contiguous (height, width, 3) view over the start of the shared buffer"""
+    return buffer[:height * width * 3].reshape(height, width, 3)
+
+
+def _worker_main(connection, shm_name, frame_bytes, hands_kwargs):
+    """Worker process: owns one MediaPipe Hands graph and serves process() requests"""
+    import mediapipe as mp
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffer = np.ndarray(frame_bytes, dtype=np.uint8, buffer=shm.buf)
+    hands = mp.solutions.hands.Hands(**hands_kwargs)
+
+    try:
+        while True:
+            request = connection.recv()
+            if request is None:
+                break
+
+            height, width = request
+            frame = _frame_view(buffer, height, width)
+            try:
+                results = hands.process(frame)
+            except ValueError as e:
+                connection.send(('error', str(e)))
+                continue
+
+            landmarks = []
+            handedness = []
+            for index, hand_landmarks in enumerate(results.multi_hand_landmarks or []):
+                landmarks.append(np.array(
+                    [(point.x, point.y, point.z) for point in hand_landmarks.landmark], dtype=np.float32))
+                label = None
+                if results.multi_handedness:
+                    label = results.multi_handedness[index].classification[0].label
+                handedness.append(label)
+
+            connection.send(('ok', landmarks, handedness))
+    finally:
+        hands.close()
+        del buffer
+        shm.close()
+
+
+class RemoteHands:
+    """Drop-in replacement for mp.solutions.hands.Hands that runs inference in a worker process.
+
+    Each instance starts one process with its own Hands graph, so every camera
+    gets a core of its own instead of sharing the GIL. Frames are written into a
+    shared-memory buffer (directly, when the caller converts into input_buffer())
+    rather than pickled; only the frame size goes over the pipe and only the
+    landmark arrays come back. process() is synchronous, so results arrive in the
+    order frames were submitted.
+
+    The shared buffer holds one max_frame_size (width, height) RGB frame, which
+    should match the pipeline's max_inference_size. Larger frames are
+    downscaled into it; landmarks are normalized, so callers don't notice.
+    """
+
+    def __init__(self, max_frame_size=DEFAULT_MAX_FRAME_SIZE, **hands_kwargs):
+        self.max_frame_size = max_frame_size or DEFAULT_MAX_FRAME_SIZE
+        frame_bytes = self.max_frame_size[0] * self.max_frame_size[1] * 3
+        self.shm = shared_memory.SharedMemory(create=True, size=frame_bytes)
+        self.buffer = np.ndarray(frame_bytes, dtype=np.uint8, buffer=self.shm.buf)
+        self._oversize_buffer = ScratchBuffer()
+
+        # spawn: never fork a process that already runs camera and server threads
+        context = mp_process.get_context('spawn')
+        self.connection, child_connection = context.Pipe()
+        self.process_handle = context.Process(
+            target=_worker_main, args=(child_connection, self.shm.name, frame_bytes, hands_kwargs), daemon=True)
+        self.process_handle.start()
+
+    def _fits(self, height, width):
+        return fit_size(width, height, self.max_frame_size) == (width, height)
+
+    def input_buffer(self, height, width):
+        """View of the shared buffer to convert the next frame into, avoiding the copy in process().
+
+        Frames too large for the shared buffer get a private buffer instead and
+        are downscaled into shared memory by process().
+        """
+        if not self._fits(height, width):
+            return self._oversize_buffer.view(height, width)
+        return _frame_view(self.buffer, height, width)
+
+    def process(self, rgb_frame):
+        height, width = rgb_frame.shape[:2]
+        if not self._fits(height, width):
+            width, height = fit_size(width, height, self.max_frame_size)
+            cv2.resize(rgb_frame, (width, height), dst=_frame_view(self.buffer, height, width),
+                       interpolation=cv2.INTER_LINEAR)
+        else:
+            target = _frame_view(self.buffer, height, width)
+            if not np.shares_memory(target, rgb_frame):
+                target[...] = rgb_frame
+        try:
+            self.connection.send((height, width))
+            response = self.connection.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            raise ValueError(f"Inference worker exited: {e}")
+
+        if response[0] == 'error':
+            raise ValueError(response[1])
+
+        _, landmarks, handedness = response
+        return self._to_results(landmarks, handedness)
+
+    @staticmethod
+    def _to_results(landmarks, handedness):
+        """Rebuild the attribute layout of MediaPipe's results from the worker's arrays"""
+        if not landmarks:
+            return SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+
+        multi_hand_landmarks = [
+            SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=float(z)) for x, y, z in points])
+            for points in landmarks
+        ]
+        multi_handedness = [
+            SimpleNamespace(classification=[SimpleNamespace(label=label)]) for label in handedness
+        ]
+        return SimpleNamespace(multi_hand_landmarks=multi_hand_landmarks, multi_handedness=multi_handedness)
+
+    def close(self):
+        if self.process_handle is None:
+            return
+
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process_handle.join(timeout=5)
+        if self.process_handle.is_alive():
+            self.process_handle.terminate()
+        self.process_handle = None
+
+        self.connection.close()
+        del self.buffer
+        self.shm.close()
+        self.shm.unlink()
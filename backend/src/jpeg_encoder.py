@@ -0,0 +1,71 @@
+"""JPEG encoders for the video stream.
+
+OpenCV is always available. simplejpeg and PyTurboJPEG call libjpeg-turbo
+directly and are noticeably faster at the same quality; they are used when
+installed (pip install simplejpeg / PyTurboJPEG) and never required.
+"""
+
+import numpy as np
+
+import cv2
+
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+try:
+    from turbojpeg import TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+
+class OpenCVEncoder:
+    name = 'opencv'
+
+    def encode(self, frame, quality):
+        """Encode a BGR frame; returns JPEG bytes or None on failure"""
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+        return buffer.tobytes() if ret else None
+
+
+class SimpleJpegEncoder:
+    name = 'simplejpeg'
+
+    def encode(self, frame, quality):
+        return simplejpeg.encode_jpeg(np.ascontiguousarray(frame), quality=int(quality), colorspace='BGR')
+
+
+class TurboJpegEncoder:
+    name = 'turbojpeg'
+
+    def __init__(self):
+        self._turbo = TurboJPEG()  # raises if the libjpeg-turbo shared library is missing
+
+    def encode(self, frame, quality):
+        return self._turbo.encode(np.ascontiguousarray(frame), quality=int(quality))
+
+
+def create_encoder(name='auto'):
+    """Return an encoder by name ('opencv', 'simplejpeg', 'turbojpeg'), or the fastest installed for 'auto'"""
+    if name == 'opencv':
+        return OpenCVEncoder()
+    if name == 'simplejpeg':
+        if simplejpeg is None:
+            raise ValueError("simplejpeg is not installed")
+        return SimpleJpegEncoder()
+    if name == 'turbojpeg':
+        if TurboJPEG is None:
+            raise ValueError("PyTurboJPEG is not installed")
+        return TurboJpegEncoder()
+    if name != 'auto':
+        raise ValueError(f"Unknown JPEG encoder '{name}'")
+
+    if simplejpeg is not None:
+        return SimpleJpegEncoder()
+    if TurboJPEG is not None:
+        try:
+            return TurboJpegEncoder()
+        except (OSError, RuntimeError):
+            pass
+    return OpenCVEncoder()
@@ -0,0 +1,66 @@
+"""Compact binary landmark packets sent by browsers or edge devices running their own hand tracking.
+
+Layout (little-endian):
+    uint8   version (1)
+    uint8   hand present (0 / 1)
+    uint8   handedness (0 unknown, 1 Left, 2 Right)
+    uint8   reserved
+    float32 frame aspect ratio (width / height)
+    float32 x 63   the 21 landmarks as normalized x, y, z - only when a hand is present
+
+So a packet is 8 bytes without a hand and 260 bytes with one.
+"""
+
+import math
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .finger_counter import NUM_LANDMARKS
+
+PACKET_VERSION = 1
+HEADER = struct.Struct('<BBBBf')
+POINTS_SIZE = NUM_LANDMARKS * 3 * 4
+
+HANDEDNESS_CODES = {None: 0, 'Left': 1, 'Right': 2}
+HANDEDNESS_LABELS = {code: label for label, code in HANDEDNESS_CODES.items()}
+
+
+class LandmarkPacket(NamedTuple):
+    points: Optional[np.ndarray]  # (21, 3) float32, or None when no hand is visible
+    handedness: Optional[str]
+    aspect: float
+
+
+def encode_packet(points=None, handedness=None, aspect=1.0) -> bytes:
+    header = HEADER.pack(PACKET_VERSION, points is not None, HANDEDNESS_CODES.get(handedness, 0), 0, aspect)
+    if points is None:
+        return header
+    return header + np.asarray(points, dtype='<f4').reshape(NUM_LANDMARKS, 3).tobytes()
+
+
+def decode_packet(data: bytes) -> LandmarkPacket:
+    """Parse a packet; raises ValueError if it is malformed or not binary"""
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise ValueError(f"Landmark packet must be binary, got {type(data).__name__}")
+    if len(data) < HEADER.size:
+        raise ValueError(f"Landmark packet too short: {len(data)} bytes")
+
+    version, has_hand, handedness_code, _, aspect = HEADER.unpack_from(data)
+    if version != PACKET_VERSION:
+        raise ValueError(f"Unsupported landmark packet version {version}")
+    if not (aspect > 0 and math.isfinite(aspect)):
+        raise ValueError(f"Invalid aspect ratio {aspect}")
+
+    if not has_hand:
+        return LandmarkPacket(None, None, aspect)
+
+    if len(data) != HEADER.size + POINTS_SIZE:
+        raise ValueError(f"Landmark packet has {len(data)} bytes, expected {HEADER.size + POINTS_SIZE}")
+
+    points = np.frombuffer(data, dtype='<f4', offset=HEADER.size).reshape(NUM_LANDMARKS, 3)
+    if not np.isfinite(points).all():
+        raise ValueError("Landmark packet contains non-finite coordinates")
+
+    return LandmarkPacket(points.astype(np.float32), HANDEDNESS_LABELS.get(handedness_code), aspect)
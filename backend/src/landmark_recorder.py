@@ -0,0 +1,224 @@
+"""Opt-in per-frame landmark recording for tuning the finger counter offline.
+
+Every frame a session observes (camera pipeline or client landmark packets) is
+appended as one row to in-memory column buffers. Full chunks are handed to a
+writer thread and saved as one .npy file per column:
+
+    <directory>/meta.json
+    <directory>/chunk-00000/points.npy       (N, 21, 3) float32, NaN rows where no hand was visible
+    <directory>/chunk-00000/handedness.npy   (N,) uint8 landmark_packet handedness codes
+    ...
+
+Chunks are written to a temporary directory and renamed, so readers never see
+a partial chunk. Once the recording exceeds max_bytes the oldest chunks are
+deleted. recording_chunks() reads them back memory-mapped, so datasets larger
+than RAM can be streamed through the batch functions in finger_counter.
+"""
+
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from .finger_counter import NUM_LANDMARKS
+from .landmark_packet import HANDEDNESS_CODES
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# column -> (dtype, per-frame shape)
+COLUMNS = {
+    'points': (np.float32, (NUM_LANDMARKS, 3)),
+    'handedness': (np.uint8, ()),
+    'aspect': (np.float32, ()),  # frame width / height
+    'finger_count': (np.int8, ()),  # raw per-frame count, -1 when no hand was visible
+    'stable_count': (np.int8, ()),  # gesture stabilizer output after this frame, -1 for none
+    'phase': (np.uint8, ()),  # index into GAME_PHASES
+    'expected': (np.int8, ()),  # number the game is asking for, 0 outside the counting game
+    'waiting': (np.bool_, ()),  # whether the game was waiting for that number
+    'timestamps': (np.float64, ()),  # seconds (time.time())
+}
+
+# Session ids used as directory names (matches the server's session id rule)
+SAFE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+GAME_PHASES = ('technical_setup', 'user_setup', 'counting_game', 'completed')
+PHASE_CODES = {phase: code for code, phase in enumerate(GAME_PHASES)}
+
+
+class LandmarkRecorder:
+    """Appends per-frame landmarks and game state to a chunked, columnar recording.
+
+    record() only copies one row into preallocated buffers; file I/O happens on
+    the writer thread. If the writer falls more than max_pending chunks behind,
+    further chunks are dropped (and counted) instead of blocking the caller.
+    """
+
+    def __init__(self, directory, chunk_frames=9000, max_bytes=1 << 30, max_pending=4, metadata=None):
+        self.directory = directory
+        self.chunk_frames = chunk_frames
+        self.max_bytes = max_bytes
+
+        self.frames_recorded = 0
+        self.chunks_written = 0
+        self.chunks_dropped = 0  # lost to writer backlog or write errors
+        self.chunks_rotated = 0  # deleted to stay under max_bytes
+
+        self.lock = threading.Lock()
+        self._buffers = None
+        self._rows = 0
+        self._next_chunk = 0
+        self._written = []  # (path, bytes) of chunks on disk, oldest first
+        self._queue = queue.Queue(maxsize=max_pending)
+
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'created': time.time(),
+            'columns': {name: {'dtype': np.dtype(dtype).str, 'shape': list(shape)}
+                        for name, (dtype, shape) in COLUMNS.items()},
+            'game_phases': list(GAME_PHASES),
+            'handedness_codes': {str(code): label for label, code in HANDEDNESS_CODES.items()},
+        }
+        meta.update(metadata or {})
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _allocate(self):
+        return {name: np.empty((self.chunk_frames,) + shape, dtype=dtype) for name, (dtype, shape) in COLUMNS.items()}
+
+    def record(self, points, handedness, aspect, finger_count, stable_count, phase, expected, waiting, timestamp):
+        """Append one frame; points is a (21, 3) array or None when no hand was visible"""
+        with self.lock:
+            if self._buffers is None:
+                self._buffers = self._allocate()
+            buffers, row = self._buffers, self._rows
+
+            if points is None:
+                buffers['points'][row] = np.nan
+            else:
+                buffers['points'][row] = points
+            buffers['handedness'][row] = HANDEDNESS_CODES.get(handedness, 0)
+            buffers['aspect'][row] = aspect
+            buffers['finger_count'][row] = -1 if finger_count is None else finger_count
+            buffers['stable_count'][row] = -1 if stable_count is None else stable_count
+            buffers['phase'][row] = PHASE_CODES.get(phase, 0)
+            buffers['expected'][row] = expected
+            buffers['waiting'][row] = waiting
+            buffers['timestamps'][row] = timestamp
+
+            self._rows += 1
+            self.frames_recorded += 1
+            if self._rows == self.chunk_frames:
+                self._rotate()
+
+    def _rotate(self):
+        """Hand the current buffers to the writer (called with the lock held)"""
+        if not self._rows:
+            return
+        chunk = (self._next_chunk, {name: column[:self._rows] for name, column in self._buffers.items()})
+        self._next_chunk += 1
+        self._buffers = None
+        self._rows = 0
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            self.chunks_dropped += 1
+            logger.warning("⚠️ Landmark writer is behind, dropped chunk %d", chunk[0])
+
+    def flush(self):
+        """Write out the partially filled chunk (e.g. when the camera stops)"""
+        with self.lock:
+            self._rotate()
+
+    def close(self):
+        """Flush and wait for every queued chunk to reach the disk"""
+        self.flush()
+        if self.thread.is_alive():
+            self._queue.put(None)
+            self.thread.join()
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            index, columns = chunk
+            try:
+                self._write(index, columns)
+            except OSError as e:
+                self.chunks_dropped += 1
+                logger.error("❌ Could not write landmark chunk %d: %s", index, e)
+
+    def _write(self, index, columns):
+        path = os.path.join(self.directory, f"chunk-{index:05d}")
+        partial = path + '.tmp'
+        os.makedirs(partial, exist_ok=True)
+        for name, column in columns.items():
+            np.save(os.path.join(partial, f"{name}.npy"), column)
+        os.replace(partial, path)
+
+        size = sum(column.nbytes for column in columns.values())
+        self._written.append((path, size))
+        self.chunks_written += 1
+        logger.info("💾 Recorded %d frames to %s", len(columns['timestamps']), path)
+
+        # Keep the newest chunk even if it alone exceeds the budget
+        while self.max_bytes and len(self._written) > 1 and sum(s for _, s in self._written) > self.max_bytes:
+            oldest, _ = self._written.pop(0)
+            shutil.rmtree(oldest, ignore_errors=True)
+            self.chunks_rotated += 1
+
+
+def recording_chunks(path, mmap=True, columns=None) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield {column: array} for every chunk under path, oldest first.
+
+    path may be one recording or a directory of recordings (e.g. the server's
+    record_dir); arrays are memory-mapped read-only unless mmap=False.
+    """
+    names = columns or list(COLUMNS)
+    pattern = os.path.join(glob.escape(path), '**', 'chunk-*')
+    for chunk in sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isdir(p) and not p.endswith('.tmp')):
+        yield {name: np.load(os.path.join(chunk, f"{name}.npy"), mmap_mode='r' if mmap else None)
+               for name in names if os.path.exists(os.path.join(chunk, f"{name}.npy"))}
+
+
+def recording_directory(root, session_id, started: Optional[float] = None):
+    """Create and return <root>/<session id>/<start time> - one recording per session run.
+
+    A recording started within the same second gets a _01, _02, ... suffix
+    (sorting after the first one), so runs never share chunks. Session ids come
+    from clients, so anything but a plain name (no separators, no '..') raises
+    ValueError, as does a path resolving outside root.
+    """
+    if not SAFE_NAME_PATTERN.match(session_id):
+        raise ValueError(f"Unsafe session id for a recording directory: {session_id[:80]!r}")
+
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(started or time.time()))
+    parent = os.path.join(root, session_id)
+    resolved_root = os.path.realpath(root)
+    if os.path.commonpath([resolved_root, os.path.realpath(parent)]) != resolved_root:
+        raise ValueError(f"Recording directory {parent} is outside {root}")
+
+    os.makedirs(parent, exist_ok=True)
+    attempt = 0
+    while True:
+        directory = os.path.join(parent, stamp if not attempt else f"{stamp}_{attempt:02d}")
+        try:
+            os.mkdir(directory)
+            return directory
+        except FileExistsError:
+            attempt += 1
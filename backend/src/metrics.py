@@ -0,0 +1,111 @@
+"""Minimal Prometheus text-format metrics, without a client library dependency.
+
+Counters and histograms are updated on the hot path (cheap, one lock);
+gauges come from collector callables that run only when /metrics is scraped.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Stage latency buckets in seconds, from sub-millisecond copies to slow inference
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Counters, histograms and scrape-time gauges rendered in the Prometheus exposition format"""
+
+    def __init__(self, prefix='carmels_game'):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.help = {}  # name -> (type, help text)
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.collectors: List[Callable] = []
+
+    def _name(self, name):
+        return f"{self.prefix}_{name}"
+
+    def describe(self, name, metric_type, help_text):
+        self.help[self._name(name)] = (metric_type, help_text)
+
+    def inc(self, name, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(self._name(name), {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.histograms.setdefault(self._name(name), {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def observe_stage(self, stage, seconds):
+        """Stage hook (see stage_timer.record_stage) feeding the stage latency histogram"""
+        self.observe('stage_seconds', seconds, stage=stage)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Iterable[Tuple[dict, float]]]]]):
+        """Register collector() -> [(name, type, help, [(labels, value), ...]), ...], called on every scrape"""
+        self.collectors.append(collector)
+
+    def _header(self, lines, name, default_type):
+        metric_type, help_text = self.help.get(name, (default_type, ''))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                self._header(lines, name, 'counter')
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                self._header(lines, name, 'histogram')
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for collector in self.collectors:
+            for name, metric_type, help_text, samples in collector():
+                full_name = self._name(name)
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_format_labels(tuple(sorted(labels.items())))} {value}")
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+from .bitrate_controller import BitrateController
+from .jpeg_encoder import create_encoder
+from .stage_timer import record_stage
+
+
+class MjpegBroadcaster:
+    """Encode-once MJPEG fan-out for /video_feed.
+
+    One thread annotates and JPEG-encodes each pipeline frame a single time and
+    hands the same multipart chunk to every connected viewer. Viewers always
+    receive the newest chunk; a slow viewer simply skips frames instead of
+    building up a queue.
+
+    Viewers get the pipeline's stream-sized frame. The full capture resolution
+    is a separate variant, encoded only while some viewer asked for it.
+
+    With a target bitrate, each viewer has its own BitrateController picking a
+    quality step and skipping frames to fit its connection; the frame is
+    encoded once per (variant, quality) pair that has viewers, not per viewer.
+    """
+
+    def __init__(self, pipeline, annotate: Optional[Callable] = None, jpeg_quality=85, encoder='auto',
+                 target_bitrate=None, stage_hooks=None):
+        self.pipeline = pipeline
+        self.annotate = annotate
+        self.jpeg_quality = jpeg_quality
+        self.encoder = create_encoder(encoder)
+        self.target_bitrate = target_bitrate  # bits/s per viewer, None for fixed jpeg_quality
+        self.stage_hooks = stage_hooks if stage_hooks is not None else []  # see stage_timer.record_stage
+
+        self.is_running = False
+        self.thread = None
+        self.viewers = Counter()  # (variant, quality) -> viewer count
+        self._condition = threading.Condition()
+        self._frames = {}  # (variant, quality) -> (seq, timestamp, jpeg bytes, multipart chunk)
+        self.pipeline.stream_enabled = False
+
+    @property
+    def viewer_count(self):
+        return sum(self.viewers.values())
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+
+        if self.thread and self.thread.is_alive():
+            self.thread.join()
+        self.thread = None
+
+    def _prepare(self, result, variant):
+        """Frame for a variant with the overlay drawn on it.
+
+        The stream-sized pool frame is only ever read by the broadcaster, so the
+        overlay goes straight onto it; the shared full frame is copied first.
+        Runs only for variants that have viewers.
+        """
+        frame = result.frame
+        owned = False
+        if variant == 'stream' and result.stream_frame is not None:
+            frame = result.stream_frame
+            owned = result.stream_slot is not None
+        if self.annotate and result.points is not None:
+            if not owned:
+                frame = frame.copy()
+            self.annotate(frame, result.points)
+        return frame
+
+    def _run(self):
+        last_seq = 0
+        while self.is_running and self.pipeline.is_running:
+            result = self.pipeline.wait_for_result(last_seq, retain=True)
+            if result is None:
+                continue
+            last_seq = result.seq
+
+            with self._condition:
+                wanted = [key for key, count in self.viewers.items() if count > 0]
+
+            # Nobody is watching - don't pay for drawing and encoding
+            if not wanted:
+                self.pipeline.release(result)
+                continue
+
+            encoded = {}
+            try:
+                for variant in {variant for variant, _ in wanted}:
+                    frame = self._prepare(result, variant)
+                    for quality in {quality for key_variant, quality in wanted if key_variant == variant}:
+                        start = time.perf_counter()
+                        jpeg = self.encoder.encode(frame, quality)
+                        record_stage(self.stage_hooks, 'encode', start)
+                        if jpeg is not None:
+                            encoded[(variant, quality)] = jpeg
+            finally:
+                self.pipeline.release(result)
+
+            with self._condition:
+                for key, jpeg in encoded.items():
+                    chunk = (b'--frame\r\n'
+                             b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                    self._frames[key] = (result.seq, result.timestamp, jpeg, chunk)
+                self._condition.notify_all()
+
+        self.is_running = False
+        with self._condition:
+            self._condition.notify_all()
+
+    def _subscribe(self, key, delta):
+        with self._condition:
+            self.viewers[key] += delta
+            if self.viewers[key] <= 0:
+                del self.viewers[key]
+            # The pipeline only builds the stream-sized frame while someone watches it
+            self.pipeline.stream_enabled = any(variant == 'stream' for variant, _ in self.viewers)
+
+    def _wait_frame(self, key, last_seq, timeout=1.0):
+        """Newest (seq, timestamp, jpeg, chunk) for key newer than last_seq, or None on timeout/stop"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: not self.is_running or self._frames.get(key, (0,))[0] > last_seq,
+                timeout=timeout
+            )
+            frame = self._frames.get(key)
+            if frame is None or frame[0] <= last_seq:
+                return None
+            return frame
+
+    def frames(self, full_resolution=False, target_bitrate=None, max_fps=None):
+        """Generator for one viewer, yielding (seq, timestamp, jpeg, multipart chunk) for each new frame.
+
+        The consumer should only resume the generator once the frame has been
+        delivered; the time that takes is what the bitrate controller adapts to.
+        max_fps caps the rate for viewers that asked for fewer frames.
+        """
+        variant = 'full' if full_resolution else 'stream'
+        target_bitrate = target_bitrate or self.target_bitrate
+        controller = BitrateController(target_bitrate) if target_bitrate else None
+        min_interval = 1.0 / max_fps if max_fps else 0.0
+
+        key = (variant, controller.quality if controller else self.jpeg_quality)
+        self._subscribe(key, 1)
+
+        try:
+            last_seq = 0
+            next_due = 0.0
+            while self.is_running:
+                delay = next_due - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+                frame = self._wait_frame(key, last_seq)
+                if frame is None:
+                    continue
+                last_seq = frame[0]
+                size = len(frame[2])
+
+                if controller and not controller.should_send(size):
+                    continue
+
+                write_start = time.time()
+                next_due = write_start + min_interval
+                yield frame
+
+                if controller:
+                    controller.on_sent(size, time.time() - write_start)
+                    if controller.quality != key[1]:
+                        self._subscribe(key, -1)
+                        key = (variant, controller.quality)
+                        self._subscribe(key, 1)
+        finally:
+            self._subscribe(key, -1)
+
+    def stream(self, full_resolution=False, target_bitrate=None):
+        """Generator for one /video_feed viewer, yielding the latest multipart chunk each time it changes"""
+        # The generator resumes once the server has written the chunk to the viewer
+        for _, _, _, chunk in self.frames(full_resolution, target_bitrate):
+            yield chunk
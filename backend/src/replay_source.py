@@ -0,0 +1,119 @@
+"""Recorded input for running the server pipeline without a webcam (benchmarks, regression runs).
+
+ReplayCapture plays a video file through the same FrameGrabber -> FramePipeline
+path as a camera. Landmark dumps replay pre-computed hand landmarks through the
+client-input path instead, skipping capture and inference entirely.
+
+A landmark dump is an .npz file with
+    points      (N, 21, 3) float32 normalized landmarks, NaN rows where no hand was visible
+    timestamps  (N,) float64 seconds
+    handedness  (N,) uint8 landmark_packet handedness codes (optional)
+    aspect      frame width / height (optional, default 1.0)
+
+A landmark recorder directory (see src/landmark_recorder.py) can be replayed
+the same way; its chunks are streamed memory-mapped.
+"""
+
+import os
+import time
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+import cv2
+
+from .landmark_packet import HANDEDNESS_LABELS
+from .landmark_recorder import recording_chunks
+
+
+class ReplayCapture:
+    """cv2.VideoCapture stand-in that plays a recorded video file.
+
+    With realtime=True frames are released at the file's frame rate like a
+    camera would deliver them; otherwise they come as fast as they decode. The
+    frame size is fixed by the recording, so set() requests are ignored.
+    """
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frames_read = 0
+        self._start_time = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        ret, frame = self.cap.read(image)
+        if not ret and self.loop and self.frames_read:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+        if not ret:
+            return False, None
+
+        if self.realtime:
+            if self._start_time is None:
+                self._start_time = time.perf_counter()
+            delay = self._start_time + self.frames_read / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.frames_read += 1
+        return True, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.cap.release()
+
+
+class LandmarkFrame(NamedTuple):
+    points: Optional[np.ndarray]  # (21, 3) float32, or None when no hand was visible
+    handedness: Optional[str]
+    aspect: float
+    timestamp: float
+
+
+def _frames(points, handedness, aspect, timestamps) -> Iterator[LandmarkFrame]:
+    present = ~np.isnan(points).any(axis=(1, 2))
+    for index in range(len(points)):
+        yield LandmarkFrame(np.array(points[index]) if present[index] else None,
+                            HANDEDNESS_LABELS.get(int(handedness[index])), float(aspect[index]),
+                            float(timestamps[index]))
+
+
+def load_landmark_dump(path) -> Iterator[LandmarkFrame]:
+    """Iterate over the frames of a landmark dump or recorder directory (see the module docstring)"""
+    if os.path.isdir(path):
+        for chunk in recording_chunks(path, columns=['points', 'handedness', 'aspect', 'timestamps']):
+            yield from _frames(chunk['points'], chunk['handedness'], chunk['aspect'], chunk['timestamps'])
+        return
+
+    with np.load(path) as dump:
+        points = dump['points'].astype(np.float32)
+        timestamps = dump['timestamps'] if 'timestamps' in dump else np.arange(len(points)) / 30.0
+        handedness = dump['handedness'] if 'handedness' in dump else np.zeros(len(points), dtype=np.uint8)
+        aspect = float(dump['aspect']) if 'aspect' in dump else 1.0
+
+    yield from _frames(points, handedness, np.full(len(points), aspect, dtype=np.float32), timestamps)
+
+
+def replay_landmarks(path, realtime=True) -> Iterator[LandmarkFrame]:
+    """load_landmark_dump, optionally paced by the recorded timestamps"""
+    start_time = None
+    first_timestamp = None
+    for frame in load_landmark_dump(path):
+        if realtime:
+            if start_time is None:
+                start_time, first_timestamp = time.perf_counter(), frame.timestamp
+            delay = start_time + (frame.timestamp - first_timestamp) - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield frame
@@ -0,0 +1,49 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+# Stages reported by the frame path, in pipeline order
+STAGES = ('grab', 'flip', 'resize', 'cvtcolor', 'inference', 'counting', 'emit', 'record', 'stream_resize', 'encode')
+
+
+def record_stage(hooks, stage, start):
+    """Report the time since start (a time.perf_counter() value) to every stage hook.
+
+    Stage hooks are plain callables hook(stage, seconds); with no hooks
+    registered this costs one truth test.
+    """
+    if hooks:
+        elapsed = time.perf_counter() - start
+        for hook in hooks:
+            hook(stage, elapsed)
+
+
+class StageStats:
+    """Stage hook that keeps recent durations per stage and reports latency percentiles"""
+
+    def __init__(self, max_samples=100_000):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=max_samples))
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """{stage: {'count', 'mean_ms', 'p50_ms', ...}} for every stage seen, in pipeline order"""
+        with self.lock:
+            samples = {stage: np.fromiter(values, dtype=np.float64) for stage, values in self.samples.items()}
+
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        summary = {}
+        for stage in sorted(samples, key=lambda stage: order.get(stage, len(STAGES))):
+            values = samples[stage] * 1000
+            if values.size == 0:
+                continue
+            stats = {'count': int(values.size), 'mean_ms': float(values.mean())}
+            for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+                stats[f"p{percentile}_ms"] = float(value)
+            summary[stage] = stats
+        return summary
@@ -1,48 +1,36 @@
 import cv2
 import logging
 
+from .camera_registry import CameraRegistry
+from .frame_grabber import FrameGrabber
+
+logger = logging.getLogger(__name__)
+
 class VideoCapture:
     def __init__(self, camera_index=None, width=640, height=480):
         self.camera_index = camera_index
         self.width = width
         self.height = height
         self.cap = None
+        self.grabber = None
         self.is_initialized = False
+        self.frame_seq = 0
 
     def _find_working_camera(self):
-        working_cameras = []
-        print("🔍 Searching for available cameras...")
-
-        # Try default camera indices first
-        for i in range(5):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret:
-                    print(f"✅ Found working camera at index {i}")
-                    working_cameras.append(i)
-                cap.release()
-
-        # If no cameras found, try DirectShow backend (Windows specific)
-        if not working_cameras:
-            print("🔍 Trying DirectShow backend...")
-            for i in range(5):
-                cap = cv2.VideoCapture(i, cv2.CAP_DSHOW)
-                if cap.isOpened():
-                    ret, frame = cap.read()
-                    if ret:
-                        print(f"✅ Found working camera at index {i} (DirectShow)")
-                        working_cameras.append(i)
-                    cap.release()
-
-        return working_cameras[0] if working_cameras else None
+        logger.info("🔍 Searching for available cameras...")
+        cameras = CameraRegistry().get_cameras()
+        if not cameras:
+            return None
+
+        logger.info("✅ Found working camera at index %s", cameras[0]['index'])
+        return cameras[0]['index']
 
     def initialize(self):
         # If no camera index specified, find one automatically
         if self.camera_index is None:
             self.camera_index = self._find_working_camera()
             if self.camera_index is None:
-                print("❌ No working cameras found!")
+                logger.error("❌ No working cameras found!")
                 return False
 
         # Try multiple backends
@@ -50,7 +38,7 @@ class VideoCapture:
 
         for backend in backends:
             try:
-                print(f"🔧 Trying to open camera {self.camera_index} with backend...")
+                logger.info("🔧 Trying to open camera %s with backend...", self.camera_index)
                 self.cap = cv2.VideoCapture(self.camera_index, backend)
 
                 if not self.cap.isOpened():
@@ -71,17 +59,21 @@ class VideoCapture:
                 actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
                 actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
+                # Drain the device on a background thread so read_frame always gets the newest frame
+                self.grabber = FrameGrabber(self.cap)
+                self.grabber.start()
+
                 self.is_initialized = True
-                print(f"✅ Camera {self.camera_index} initialized at {actual_width}x{actual_height}")
+                logger.info("✅ Camera %s initialized at %dx%d", self.camera_index, actual_width, actual_height)
                 return True
 
             except Exception as e:
-                logging.error(f"Failed to initialize camera with backend: {e}")
+                logger.error("Failed to initialize camera with backend: %s", e)
                 if self.cap:
                     self.cap.release()
                 continue
 
-        logging.error(f"Failed to initialize camera {self.camera_index} with any backend")
+        logger.error("Failed to initialize camera %s with any backend", self.camera_index)
         return False
 
     def read_frame(self):
@@ -89,34 +81,44 @@ class VideoCapture:
             return False, None
 
         try:
-            ret, frame = self.cap.read()
-            if not ret or frame is None:
-                logging.warning("Failed to read frame from camera")
+            seq, frame = self.grabber.read_latest(self.frame_seq)
+            if frame is None:
+                logger.warning("Failed to read frame from camera")
                 return False, None
+            self.frame_seq = seq
 
             # Validate frame properties
             if frame.size == 0 or len(frame.shape) != 3:
-                logging.warning("Invalid frame dimensions")
+                logger.warning("Invalid frame dimensions")
                 return False, None
 
             # Ensure frame is contiguous and properly formatted
             if not frame.flags['C_CONTIGUOUS']:
                 frame = frame.copy()
 
-            # Mirror the frame
+            # Mirror the frame (this also copies it out of the grabber's ring buffer)
             frame = cv2.flip(frame, 1)
 
             return True, frame
 
         except Exception as e:
-            logging.error(f"Error reading frame: {e}")
+            logger.error("Error reading frame: %s", e)
             return False, None
 
+    @property
+    def dropped_frames(self):
+        return self.grabber.dropped_frames if self.grabber else 0
+
     def release(self):
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
+
         if self.cap is not None:
             self.cap.release()
             self.is_initialized = False
-            logging.info("Camera released")
+            logger.info("Camera released")
 
     def is_connected(self):
-        return self.is_initialized and self.cap is not None and self.cap.isOpened()
\ No newline at end of file
+        return (self.is_initialized and self.cap is not None and self.cap.isOpened()
+                and self.grabber is not None and self.grabber.is_running)
\ No newline at end of file
@@ -0,0 +1,87 @@
+import threading
+from typing import Callable
+
+
+class VideoSubscription:
+    """One client's binary video stream; the thread exits once stopped is set"""
+
+    def __init__(self, get_broadcaster: Callable, full_resolution=False, target_bitrate=None, max_fps=None):
+        self.get_broadcaster = get_broadcaster
+        self.full_resolution = full_resolution
+        self.target_bitrate = target_bitrate
+        self.max_fps = max_fps
+        self.stopped = threading.Event()
+
+
+class VideoChannel:
+    """Binary Socket.IO alternative to the multipart /video_feed.
+
+    Each subscribed client gets 'video_frame' events carrying the raw JPEG with
+    its pipeline sequence number and capture timestamp, so the client can line
+    frames up with gesture events. Only one frame per client is in flight: the
+    next is sent after the client acknowledges the previous one (or ack_timeout
+    passes), and frames produced in the meantime are skipped, never queued.
+    Clients can cap the frame rate, and the broadcaster's bitrate controller
+    sees the ack round trip as the delivery time. No HTTP worker is held per
+    viewer.
+    """
+
+    def __init__(self, socketio, ack_timeout=2.0):
+        self.socketio = socketio
+        self.ack_timeout = ack_timeout
+        self.subscriptions = {}  # sid -> VideoSubscription
+        self.lock = threading.Lock()
+
+    def subscribe(self, sid, get_broadcaster: Callable, full_resolution=False, target_bitrate=None, max_fps=None):
+        """(Re)start streaming to sid; get_broadcaster returns the session's current MjpegBroadcaster or None"""
+        subscription = VideoSubscription(get_broadcaster, full_resolution, target_bitrate, max_fps)
+        with self.lock:
+            previous = self.subscriptions.get(sid)
+            self.subscriptions[sid] = subscription
+        if previous is not None:
+            previous.stopped.set()
+
+        self.socketio.start_background_task(self._run, sid, subscription)
+
+    def unsubscribe(self, sid):
+        with self.lock:
+            subscription = self.subscriptions.pop(sid, None)
+        if subscription is not None:
+            subscription.stopped.set()
+
+    def stop(self):
+        with self.lock:
+            subscriptions = list(self.subscriptions.values())
+            self.subscriptions = {}
+        for subscription in subscriptions:
+            subscription.stopped.set()
+
+    @property
+    def subscriber_count(self):
+        with self.lock:
+            return len(self.subscriptions)
+
+    def _run(self, sid, subscription):
+        while not subscription.stopped.is_set():
+            broadcaster = subscription.get_broadcaster()
+            if broadcaster is None or not broadcaster.is_running:
+                # Camera not started yet (or restarting) - keep the subscription alive
+                subscription.stopped.wait(0.5)
+                continue
+
+            frames = broadcaster.frames(subscription.full_resolution, subscription.target_bitrate,
+                                        subscription.max_fps)
+            try:
+                for seq, timestamp, jpeg, _ in frames:
+                    if subscription.stopped.is_set():
+                        break
+
+                    acked = threading.Event()
+                    self.socketio.emit('video_frame', {
+                        'seq': seq,
+                        'timestamp': timestamp,
+                        'frame': jpeg
+                    }, to=sid, callback=lambda *args: acked.set())
+                    acked.wait(self.ack_timeout)
+            finally:
+                frames.close()
@@ -17,6 +17,16 @@ class GameClient {
 
         // Connection settings
         this.serverUrl = window.location.origin;
+        // Station this screen belongs to (?station=<id>); each station runs its own game on the server
+        const params = new URLSearchParams(window.location.search);
+        this.sessionId = params.get('station') || 'default';
+        // Video transport: 'mjpeg' (/video_feed) or 'socket' (binary frames over Socket.IO, ?video=socket&fps=10)
+        this.videoTransport = params.get('video') || 'mjpeg';
+        this.videoFps = parseFloat(params.get('fps')) || null;
+        this.videoChannelWanted = false;  // the game screen shows socket video (survives hide / reconnect)
+        this.videoChannelActive = false;  // the server is currently streaming to us
+        this.videoFrameUrl = null;
+        this.lastVideoFrame = { seq: 0, timestamp: 0 };
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
 
@@ -41,6 +51,7 @@ class GameClient {
             // Video elements
             videoSection: document.getElementById('video-section'),
             videoFeed: document.getElementById('video-feed'),
+            landmarkOverlay: document.getElementById('landmark-overlay'),
             gestureIndicator: document.getElementById('gesture-indicator'),
 
             // Game content elements
@@ -88,6 +99,16 @@ class GameClient {
         this.elements.playAgainBtn.addEventListener('click', () => this.restartGame());
         this.elements.dismissErrorBtn.addEventListener('click', () => this.dismissError());
 
+        // Don't let the server encode video for a hidden tab or a page being left
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) {
+                this.stopVideoChannel();
+            } else if (this.videoChannelWanted) {
+                this.startVideoChannel();
+            }
+        });
+        window.addEventListener('pagehide', () => this.stopVideoChannel());
+
         console.log('🎛️ Event handlers setup complete');
     }
 
@@ -117,6 +138,14 @@ class GameClient {
             this.updateConnectionStatus('connected', 'Connected to game server');
             this.updateDebugInfo('connection', 'Connected');
 
+            // Join this station's session (also re-joins after a reconnect)
+            this.socket.emit('join_session', { session_id: this.sessionId });
+
+            // The server dropped our video subscription with the old connection
+            if (this.videoChannelWanted && !document.hidden) {
+                this.startVideoChannel();
+            }
+
             // Initialize audio manager
             if (!this.audioManager) {
                 this.audioManager = new AudioManager();
@@ -137,6 +166,8 @@ class GameClient {
             this.isConnected = false;
             this.updateConnectionStatus('error', 'Disconnected from server');
             this.updateDebugInfo('connection', 'Disconnected');
+            // The server unsubscribes a disconnected client itself
+            this.videoChannelActive = false;
         });
 
         this.socket.on('connect_error', (error) => {
@@ -145,6 +176,15 @@ class GameClient {
         });
 
         // Server status
+        this.socket.on('session_joined', (data) => {
+            console.log('🧒 Joined session:', data.session_id);
+        });
+
+        this.socket.on('session_error', (data) => {
+            console.error('❌ Cannot join session:', data.session_id, data.message);
+            this.updateDebugInfo('connection', `Session error: ${data.message}`);
+        });
+
         this.socket.on('server_status', (data) => {
             console.log('📡 Server status:', data);
             this.updateAvatarMessage(data.message || 'Server is ready!');
@@ -156,6 +196,22 @@ class GameClient {
             this.displayAvailableCameras(data.cameras);
         });
 
+        // Binary video channel: one frame in flight, acknowledged once it has been decoded
+        this.socket.on('video_frame', (data, ack) => this.onVideoFrame(data, ack));
+
+        // Landmarks for the canvas overlay (server overlay='client'), one binary packet per frame
+        this.socket.on('hand_landmarks', (data) => this.drawHandOverlay(data.packet));
+
+        this.socket.on('video_error', (data) => {
+            console.error('❌ Video channel refused:', data.message);
+            this.videoChannelActive = false;
+            this.videoChannelWanted = false;
+        });
+
+        this.socket.on('landmark_error', (data) => {
+            console.warn('⚠️ Landmark packet rejected:', data.message);
+        });
+
         this.socket.on('camera_status', (data) => {
             console.log('📹 Camera status:', data);
             if (data.status === 'started') {
@@ -166,16 +222,20 @@ class GameClient {
         });
 
         // Gesture detection events
-        this.socket.on('gesture_detected', (data) => {
-            console.log('🤖 Gesture detected:', data);
-            this.handleGestureDetected(data);
-            this.updateDebugInfo('gesture', `${data.number} (${data.confidence.toFixed(2)})`);
-        });
-
-        this.socket.on('gesture_lost', (data) => {
-            console.log('👋 Gesture lost');
-            this.handleGestureLost(data);
-            this.updateDebugInfo('gesture', 'None');
+        this.socket.on('gesture_detected', (data) => this.onGestureDetected(data));
+        this.socket.on('gesture_lost', (data) => this.onGestureLost(data));
+
+        // Coalesced high-frequency events, delivered in order once per server tick
+        this.socket.on('event_batch', (batch) => {
+            batch.events.forEach(({ event, data }) => {
+                if (event === 'gesture_detected') {
+                    this.onGestureDetected(data);
+                } else if (event === 'gesture_lost') {
+                    this.onGestureLost(data);
+                } else {
+                    console.warn('⚠️ Unknown batched event:', event);
+                }
+            });
         });
 
         // Game flow events (these will be implemented in Phase 3)
@@ -326,13 +386,148 @@ class GameClient {
     }
 
     startVideoFeed() {
+        if (this.videoTransport === 'socket') {
+            this.videoChannelWanted = true;
+            this.startVideoChannel();
+            return;
+        }
+
         // Start the video feed from the backend
-        const videoUrl = `${window.location.origin}/video_feed`;
+        const videoUrl = `${window.location.origin}/video_feed?session=${encodeURIComponent(this.sessionId)}`;
         this.elements.videoFeed.src = videoUrl;
         console.log('📹 Starting video feed from:', videoUrl);
     }
 
+    startVideoChannel() {
+        if (this.socket && this.socket.connected && !this.videoChannelActive) {
+            this.socket.emit('subscribe_video', { fps: this.videoFps });
+            this.videoChannelActive = true;
+            console.log('📹 Subscribed to binary video channel', this.videoFps ? `at ${this.videoFps} fps` : '');
+        }
+    }
+
+    stopVideoChannel() {
+        if (this.socket && this.socket.connected && this.videoChannelActive) {
+            this.socket.emit('unsubscribe_video', {});
+            console.log('📹 Unsubscribed from binary video channel');
+        }
+        this.videoChannelActive = false;
+    }
+
+    onVideoFrame(data, ack) {
+        // Frames carry the pipeline sequence number and capture timestamp (server clock, seconds)
+        this.lastVideoFrame = { seq: data.seq, timestamp: data.timestamp };
+
+        const url = URL.createObjectURL(new Blob([data.frame], { type: 'image/jpeg' }));
+        const img = this.elements.videoFeed;
+        const done = () => {
+            img.onload = img.onerror = null;
+            if (this.videoFrameUrl) {
+                URL.revokeObjectURL(this.videoFrameUrl);
+            }
+            this.videoFrameUrl = url;
+            if (ack) {
+                ack();
+            }
+        };
+        img.onload = done;
+        img.onerror = done;
+        img.src = url;
+    }
+
+    drawHandOverlay(packet) {
+        // Packet layout matches backend/src/landmark_packet.py; only hand presence and points are needed
+        const canvas = this.elements.landmarkOverlay;
+        const img = this.elements.videoFeed;
+        if (!canvas || !img.naturalWidth) return;
+
+        canvas.width = canvas.clientWidth;
+        canvas.height = canvas.clientHeight;
+        const ctx = canvas.getContext('2d');
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+
+        const view = new DataView(packet);
+        if (view.byteLength < 8 + 63 * 4 || view.getUint8(1) === 0) return;
+
+        // The feed is drawn with object-fit: contain - map onto the letterboxed image area
+        const scale = Math.min(canvas.width / img.naturalWidth, canvas.height / img.naturalHeight);
+        const width = img.naturalWidth * scale;
+        const height = img.naturalHeight * scale;
+        const left = (canvas.width - width) / 2;
+        const top = (canvas.height - height) / 2;
+        const points = [];
+        for (let i = 0; i < 21; i++) {
+            points.push([
+                left + view.getFloat32(8 + i * 12, true) * width,
+                top + view.getFloat32(8 + i * 12 + 4, true) * height
+            ]);
+        }
+
+        // Same skeleton as backend/src/hand_overlay.py
+        const polylines = [
+            [0, 1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12], [13, 14, 15, 16],
+            [0, 17, 18, 19, 20], [0, 5, 9, 13, 17]
+        ];
+        ctx.strokeStyle = '#ffffff';
+        ctx.lineWidth = 2;
+        ctx.beginPath();
+        polylines.forEach((chain) => {
+            chain.forEach((index, i) => {
+                const [x, y] = points[index];
+                if (i === 0) ctx.moveTo(x, y); else ctx.lineTo(x, y);
+            });
+        });
+        ctx.stroke();
+
+        ctx.fillStyle = '#00ff00';
+        points.forEach(([x, y]) => {
+            ctx.beginPath();
+            ctx.arc(x, y, 5, 0, 2 * Math.PI);
+            ctx.fill();
+        });
+    }
+
+    // Client-side landmark input (hand tracking runs in the browser or on an edge device)
+    startLandmarkInput() {
+        if (this.socket) {
+            this.socket.emit('start_landmark_input', {});
+        }
+    }
+
+    sendLandmarks(points, handedness = null, aspect = 1.0) {
+        // points: 63 floats (21 landmarks x normalized x, y, z), or null when no hand is visible.
+        // Packet layout matches backend/src/landmark_packet.py.
+        if (!this.socket) return;
+
+        const hasHand = points !== null && points !== undefined;
+        const buffer = new ArrayBuffer(8 + (hasHand ? 63 * 4 : 0));
+        const view = new DataView(buffer);
+        view.setUint8(0, 1); // version
+        view.setUint8(1, hasHand ? 1 : 0);
+        view.setUint8(2, handedness === 'Left' ? 1 : handedness === 'Right' ? 2 : 0);
+        view.setFloat32(4, aspect, true);
+        if (hasHand) {
+            for (let i = 0; i < 63; i++) {
+                view.setFloat32(8 + i * 4, points[i], true);
+            }
+        }
+
+        this.socket.emit('landmarks', buffer);
+    }
+
     // Gesture Handling
+    onGestureDetected(data) {
+        console.log('🤖 Gesture detected:', data);
+        this.handleGestureDetected(data);
+        this.updateDebugInfo('gesture', `${data.number} (${data.confidence.toFixed(2)})`);
+    }
+
+    onGestureLost(data) {
+        console.log('👋 Gesture lost');
+        this.handleGestureLost(data);
+        this.updateDebugInfo('gesture', 'None');
+    }
+
     handleGestureDetected(data) {
         const number = data.number;
         const confidence = data.confidence;